@@ -1,6 +1,5 @@
 ﻿"""APA-7 citation validation."""
 import re
-import requests
 from typing import List, Dict, Tuple
 from ..logger import logger
 
@@ -12,6 +11,8 @@ class APAValidator:
     
     def validate_doi(self, doi: str, timeout: int = 5) -> bool:
         """Check if DOI is valid and accessible."""
+        import requests
+        
         try:
             response = requests.head(f"https://doi.org/{doi}", timeout=timeout, allow_redirects=True)
             return response.status_code == 200
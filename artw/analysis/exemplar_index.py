@@ -0,0 +1,323 @@
+"""BM25 exemplar retrieval over corpus paragraphs."""
+from pathlib import Path
+from typing import Dict, List, Optional
+from array import array
+from collections import Counter, defaultdict
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import unicodedata
+import uuid
+import jsonlines
+from ..tracing import span
+from ..logger import logger
+
+INDEX_VERSION = 2
+
+# Veri dosyaları derleme kimliğiyle adlandırılır (postings-<build>.bin); meta.json
+# hangi derlemenin geçerli olduğunu gösterir ve en son, atomik olarak değiştirilir
+_PARTS = ("postings.bin", "doclens.bin", "offsets.bin", "paragraphs.jsonl")
+_PART_FILE = re.compile(r'^(postings|doclens|offsets|paragraphs)-([0-9a-f]+)\.(bin|jsonl)$')
+
+# Sık geçen Türkçe işlev sözcükleri (kök kesmeden önce elenir)
+TR_STOPWORDS = {
+    "acaba", "ama", "ancak", "artık", "aslında", "az", "bazı", "belki", "ben", "beri",
+    "bile", "bir", "biri", "birkaç", "biz", "bu", "buna", "bunda", "bundan", "bunu",
+    "bunun", "çok", "çünkü", "da", "daha", "de", "değil", "diğer", "diye", "en", "gibi",
+    "göre", "hem", "hep", "her", "hiç", "için", "ile", "ise", "ki", "kadar", "mı", "mi",
+    "mu", "mü", "nasıl", "ne", "neden", "nın", "nin", "o", "olan", "olarak", "oldu",
+    "olduğu", "olmak", "olup", "on", "ona", "onu", "onun", "sonra", "şey", "şu", "şöyle",
+    "tüm", "ve", "veya", "ya", "yani", "yine", "üzere", "s", "vd", "et", "al",
+}
+
+_APOSTROPHE_SUFFIX = re.compile(r"['’][^\W\d_]+")
+_WORD = re.compile(r"[^\W\d_]+")
+_FOLD = str.maketrans({"â": "a", "î": "i", "û": "u", "Â": "a", "Î": "i", "Û": "u",
+                       "I": "ı", "İ": "i"})
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Türkçe sondan eklemeli; ilk 5 harfle kesme (F5) basit ama etkili bir kök yaklaşımı
+STEM_LENGTH = 5
+
+
+def normalize(text: str) -> List[str]:
+    """
+    Turkish-aware tokenization for indexing and queries.
+
+    Folds I/İ before lowercasing, drops circumflexes and suffixes after an
+    apostrophe ("Osman Hamdi'nin" -> osman, hamdi), removes stopwords and
+    truncates terms to STEM_LENGTH characters.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _APOSTROPHE_SUFFIX.sub("", text).translate(_FOLD).lower()
+    return [word[:STEM_LENGTH] for word in _WORD.findall(text)
+            if len(word) > 1 and word not in TR_STOPWORDS]
+
+
+def split_paragraphs(text: str, min_words: int = 20, max_words: int = 180) -> List[str]:
+    """
+    Split extracted PDF text into paragraph-sized passages.
+
+    Blank lines separate paragraphs; soft line breaks and hyphenation are
+    joined. Overlong blocks are cut at sentence boundaries and fragments
+    shorter than min_words (headers, page numbers) are dropped.
+    """
+    passages = []
+    # PDF ligatürleri (ﬁ, ﬂ) ve uyumluluk karakterleri düz harflere
+    text = unicodedata.normalize("NFKC", text)
+    for block in re.split(r'\n\s*\n', text):
+        block = re.sub(r'-\n(?=[a-zçğıöşü])', '', block)
+        block = re.sub(r'\s+', ' ', block).strip()
+        if not block:
+            continue
+
+        current: List[str] = []
+        count = 0
+        for sentence in _SENTENCE_END.split(block):
+            words = len(sentence.split())
+            if current and count + words > max_words:
+                passages.append(" ".join(current))
+                current, count = [], 0
+            current.append(sentence)
+            count += words
+        if current:
+            passages.append(" ".join(current))
+
+    return [p for p in passages if len(p.split()) >= min_words]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def fit_to_budget(passages: List[str], max_tokens: int) -> List[str]:
+    """Keep passages in rank order while they fit in the token budget."""
+    selected = []
+    used = 0
+    for passage in passages:
+        cost = estimate_tokens(passage)
+        if used + cost > max_tokens:
+            continue
+        selected.append(passage)
+        used += cost
+    return selected
+
+
+def _part_path(index_dir: Path, part: str, build: str) -> Path:
+    stem, ext = os.path.splitext(part)
+    return index_dir / f"{stem}-{build}{ext}"
+
+
+def _current_build(index_dir: Path) -> Optional[str]:
+    try:
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            return json.load(f).get("build")
+    except (OSError, ValueError):
+        return None
+
+
+def build_index(corpus_file: Path, index_dir: Path,
+                k1: float = 1.2, b: float = 0.75) -> int:
+    """
+    Build an on-disk BM25 index of corpus paragraphs.
+
+    Layout of index_dir (<build> is a fresh id per build):
+        meta.json                  build id, parameters, statistics and
+                                   term -> [offset, df]
+        postings-<build>.bin       uint32 (paragraph id, tf) pairs, grouped by term
+        doclens-<build>.bin        uint32 length (terms) per paragraph
+        paragraphs-<build>.jsonl   {"text", "source"} per paragraph
+        offsets-<build>.bin        uint64 byte offset of each paragraph line
+
+    Existing files are never rewritten: the new build's files are written
+    next to them and meta.json is swapped in with os.replace, so an open
+    ExemplarIndex keeps reading its own (mapped) build. Files of older
+    builds than the previous one are removed, except those still open
+    (Windows refuses to delete them); a later build retries.
+
+    Args:
+        corpus_file: JSONL from ingest_corpus
+        index_dir: Output directory
+        k1: BM25 term-frequency saturation
+        b: BM25 length normalization
+
+    Returns:
+        Number of indexed paragraphs
+    """
+    index_dir.mkdir(parents=True, exist_ok=True)
+    previous = _current_build(index_dir)
+    build = uuid.uuid4().hex[:12]
+    postings: Dict[str, List[int]] = defaultdict(list)
+    doclens = array("I")
+    offsets = array("Q")
+
+    with span("index.build"), \
+            jsonlines.open(corpus_file) as reader, \
+            open(_part_path(index_dir, "paragraphs.jsonl", build), "wb") as out:
+        for doc in reader:
+            source = doc.get("metadata", {}).get("filename") or doc.get("path", "")
+            for passage in split_paragraphs(doc.get("text", "")):
+                terms = normalize(passage)
+                if not terms:
+                    continue
+                pid = len(doclens)
+                for term, tf in Counter(terms).items():
+                    postings[term].extend((pid, tf))
+                doclens.append(len(terms))
+                offsets.append(out.tell())
+                out.write(json.dumps({"text": passage, "source": source},
+                                     ensure_ascii=False).encode("utf-8") + b"\n")
+        offsets.append(out.tell())
+
+    terms: Dict[str, List[int]] = {}
+    with open(_part_path(index_dir, "postings.bin", build), "wb") as f:
+        position = 0
+        for term in sorted(postings):
+            pairs = array("I", postings[term])
+            pairs.tofile(f)
+            terms[term] = [position, len(pairs) // 2]
+            position += len(pairs)
+
+    with open(_part_path(index_dir, "doclens.bin", build), "wb") as f:
+        doclens.tofile(f)
+    with open(_part_path(index_dir, "offsets.bin", build), "wb") as f:
+        offsets.tofile(f)
+
+    count = len(doclens)
+    tmp_meta = index_dir / f"meta.json.{build}.tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": INDEX_VERSION,
+            "build": build,
+            "byteorder": sys.byteorder,
+            "paragraphs": count,
+            "avgdl": sum(doclens) / count if count else 0.0,
+            "k1": k1,
+            "b": b,
+            "stem_length": STEM_LENGTH,
+            "terms": terms,
+        }, f, ensure_ascii=False)
+    os.replace(tmp_meta, index_dir / "meta.json")
+
+    # Önceki derleme açık okuyucular için kalır; daha eskileri silinir
+    for path in index_dir.iterdir():
+        match = _PART_FILE.match(path.name)
+        if (match and match.group(2) not in (build, previous)) or path.name in _PARTS:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                # Windows'ta açık/eşlenmiş dosya silinemez; sonraki derleme tekrar dener
+                logger.debug(f"Keeping {path.name} for a later build: {e}")
+
+    logger.info(f"Indexed {count} paragraphs, {len(terms)} terms → {index_dir}")
+    return count
+
+
+class ExemplarIndex:
+    """Query a BM25 index built by build_index; postings are memory-mapped.
+
+    Call close() (or use it as a context manager) to release the mappings.
+    """
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = index_dir
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION or meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Incompatible index at {index_dir}; rebuild with 'artw index'")
+
+        self.count = meta["paragraphs"]
+        self.avgdl = meta["avgdl"] or 1.0
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.terms: Dict[str, List[int]] = meta["terms"]
+        self.build: str = meta["build"]
+
+        self._files = []
+        self._maps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+        try:
+            self._postings = self._map("postings.bin", "I")
+            self._doclens = self._map("doclens.bin", "I")
+            self._offsets = self._map("offsets.bin", "Q")
+            self._paragraphs = self._mmap("paragraphs.jsonl")
+        except OSError:
+            self.close()
+            raise
+
+    def _mmap(self, part: str) -> Optional[mmap.mmap]:
+        f = open(_part_path(self.index_dir, part, self.build), "rb")
+        self._files.append(f)
+        # Boş dosya mmap edilemez (ör. boş korpus)
+        if f.seek(0, 2) == 0:
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def _map(self, part: str, fmt: str) -> memoryview:
+        mapped = self._mmap(part)
+        base = memoryview(mapped if mapped is not None else b"")
+        view = base.cast(fmt)
+        self._views += [view, base]
+        return view
+
+    def close(self):
+        """Release memory maps and file handles; the index is unusable afterwards."""
+        for view in self._views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._views, self._maps, self._files = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+
+    def paragraph(self, pid: int) -> Dict:
+        """Load one paragraph record by id."""
+        start, end = self._offsets[pid], self._offsets[pid + 1]
+        return json.loads(self._paragraphs[start:end])
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """
+        Return the top-k paragraphs for a topic or section title.
+
+        Returns:
+            Dicts with id, score, text and source, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        with span("index.search", query=query):
+            for term in set(normalize(query)):
+                entry = self.terms.get(term)
+                if not entry:
+                    continue
+                offset, df = entry
+                idf = self.idf(df)
+                pairs = self._postings[offset:offset + 2 * df]
+                for i in range(0, len(pairs), 2):
+                    pid, tf = pairs[i], pairs[i + 1]
+                    norm = self.k1 * (1 - self.b + self.b * self._doclens[pid] / self.avgdl)
+                    scores[pid] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+        hits = []
+        for pid, score in top:
+            record = self.paragraph(pid)
+            record.update(id=pid, score=round(score, 4))
+            hits.append(record)
+        return hits
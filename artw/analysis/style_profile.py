@@ -5,6 +5,7 @@ import json
 import jsonlines
 from collections import Counter
 import re
+from ..tracing import span, traced
 from ..logger import logger
 
 class StyleProfiler:
@@ -16,11 +17,12 @@ class StyleProfiler:
     def load_corpus(self, corpus_file: Path):
         """Load corpus from JSONL."""
         logger.info(f"Loading corpus from {corpus_file}")
-        with jsonlines.open(corpus_file) as reader:
+        with span("profile.load_corpus"), jsonlines.open(corpus_file) as reader:
             for obj in reader:
                 self.texts.append(obj['text'])
         logger.info(f"Loaded {len(self.texts)} documents")
     
+    @traced("profile.analyze")
     def analyze(self) -> Dict:
         """Generate style profile."""
         profile = {
@@ -33,6 +35,7 @@ class StyleProfiler:
         }
         return profile
     
+    @traced("profile.vocabulary")
     def _analyze_vocabulary(self) -> Dict:
         """Analyze vocabulary patterns."""
         all_words = []
@@ -49,6 +52,7 @@ class StyleProfiler:
             "lexical_diversity": len(word_freq) / len(all_words) if all_words else 0
         }
     
+    @traced("profile.sentences")
     def _analyze_sentences(self) -> Dict:
         """Analyze sentence structure."""
         all_sentences = []
@@ -64,6 +68,7 @@ class StyleProfiler:
             "total_sentences": len(all_sentences)
         }
     
+    @traced("profile.citations")
     def _analyze_citations(self) -> Dict:
         """Analyze citation patterns."""
         citation_patterns = {
@@ -79,6 +84,7 @@ class StyleProfiler:
         
         return counts
     
+    @traced("profile.terminology")
     def _extract_terminology(self) -> List[str]:
         """Extract domain-specific terms."""
         all_text = " ".join(self.texts)
@@ -1,18 +1,108 @@
 ﻿"""Command-line interface."""
 import click
 from pathlib import Path
-from rich.console import Console
 from ..config import Config
 from ..logger import logger
 import json
+import sys
+import time
 
-console = Console()
+
+class _LazyConsole:
+    """rich Console created on first use, so --help does not import rich."""
+    
+    _console = None
+    
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
 
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option('--trace', 'trace_out', type=click.Path(), default=None,
+              help='Write a per-stage timeline (Chrome trace JSON) to this file')
+@click.option('--profile', 'cprofile', is_flag=True, help='Run the command under cProfile')
+@click.option('--profile-out', type=click.Path(), default='artw.prof', help='cProfile stats file')
+@click.option('--server', default=None,
+              help='Forward ingest/profile/index/generate/export to an artw serve daemon '
+                   '(host:port or unix:/path; default: ARTW_SERVER)')
+@click.pass_context
+def cli(ctx, trace_out, cprofile, profile_out, server):
     """ARTW StyleKit - Academic writing assistant."""
-    Config.ensure_dirs()
+    ctx.obj = {"server": server}
+    
+    if cprofile:
+        _start_profiler(ctx, Path(profile_out))
+    
+    if trace_out:
+        from .. import tracing
+        
+        tracing.enable()
+        # Kapanışlar ters sırada çalışır: önce komut span'i biter, sonra dosya yazılır
+        ctx.call_on_close(lambda: _write_trace(Path(trace_out)))
+        ctx.with_resource(tracing.span(f"artw {ctx.invoked_subcommand}"))
+
+
+def _write_trace(path: Path):
+    from .. import tracing
+    
+    tracing.write_trace(path)
+    console.print(f"[dim]Trace saved → {path}[/]")
+
+
+def _client():
+    """ServerClient for the configured daemon, or None to run locally."""
+    ctx = click.get_current_context()
+    address = ctx.find_root().obj.get("server") or Config.SERVER
+    if not address:
+        return None
+    from ..server import ServerClient
+    return ServerClient(address)
+
+
+def _remote(client, operation: str, **params):
+    """Run operation on the daemon; paths must already be absolute."""
+    from ..server import ServerError
+    
+    try:
+        return client.call(operation, **params)
+    except ServerError as e:
+        raise click.ClickException(str(e))
+
+
+def _local_only(client, **options):
+    """Reject options the daemon cannot honour when forwarding to it."""
+    used = [f"--{name.replace('_', '-')}" for name, value in options.items() if value]
+    if client and used:
+        raise click.UsageError(f"{', '.join(used)} cannot be used with --server/ARTW_SERVER "
+                               "(the daemon's pool is sized by 'artw serve --workers')")
+
+
+def _abs(path) -> str:
+    return str(Path(path).resolve()) if path else path
+
+
+def _start_profiler(ctx, path: Path):
+    """Profile the rest of the command; print top functions and dump stats on exit."""
+    import cProfile
+    import pstats
+    
+    profiler = cProfile.Profile()
+    
+    def finish():
+        profiler.disable()
+        profiler.dump_stats(str(path))
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(25)
+        console.print(f"[dim]Profile saved → {path} (python -m pstats {path})[/]")
+    
+    ctx.call_on_close(finish)
+    profiler.enable()
 
 @cli.command()
 @click.option('--src', type=click.Path(exists=True), required=True, help='Source directory')
@@ -21,13 +111,19 @@ def cli():
 @click.option('--workers', type=int, default=None, help='Parallel workers')
 def ingest(src, out, sample, workers):
     """Ingest PDF corpus."""
-    from ..ingest.parallel_ingest import ingest_corpus
-    
     src_path = Path(src)
     out_path = Path(out)
-    
     console.print(f"[bold blue]Ingesting corpus from {src_path}[/]")
-    processed = ingest_corpus(src_path, out_path, sample, workers)
+    
+    client = _client()
+    _local_only(client, workers=workers)
+    if client:
+        processed = _remote(client, "ingest", src=_abs(src), out=_abs(out), sample=sample)["processed"]
+    else:
+        from ..ingest.parallel_ingest import ingest_corpus
+        
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        processed = ingest_corpus(src_path, out_path, sample, workers)
     console.print(f"[bold green]✓ Processed {processed} documents → {out_path}[/]")
 
 @cli.command()
@@ -35,6 +131,15 @@ def ingest(src, out, sample, workers):
 @click.option('--out', type=click.Path(), default='data/style_profile.json', help='Output JSON file')
 def profile(corpus, out):
     """Generate style profile."""
+    client = _client()
+    if client:
+        console.print("[bold blue]Analyzing style (server)...[/]")
+        result = _remote(client, "profile", corpus=_abs(corpus), out=_abs(out))
+        console.print(f"[bold green]✓ Profile saved → {out}[/]")
+        console.print(f"  Documents: {result['document_count']}")
+        console.print(f"  Avg length: {result['avg_doc_length']:.0f} words")
+        return
+    
     from ..analysis.style_profile import StyleProfiler
     
     profiler = StyleProfiler()
@@ -44,6 +149,7 @@ def profile(corpus, out):
     profile_data = profiler.analyze()
     
     out_path = Path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
     with open(out_path, 'w', encoding='utf-8') as f:
         json.dump(profile_data, f, indent=2, ensure_ascii=False)
     
@@ -51,6 +157,48 @@ def profile(corpus, out):
     console.print(f"  Documents: {profile_data['document_count']}")
     console.print(f"  Avg length: {profile_data['avg_doc_length']:.0f} words")
 
+@cli.command()
+@click.option('--corpus', type=click.Path(exists=True), required=True, help='Corpus JSONL file')
+@click.option('--out', type=click.Path(), default='data/index', help='Index directory')
+def index(corpus, out):
+    """Build the BM25 exemplar index over corpus paragraphs."""
+    start = time.perf_counter()
+    client = _client()
+    if client:
+        count = _remote(client, "index", corpus=_abs(corpus), out=_abs(out))["paragraphs"]
+    else:
+        from ..analysis.exemplar_index import build_index
+        count = build_index(Path(corpus), Path(out))
+    console.print(f"[bold green]✓ Indexed {count} paragraphs → {out}[/] "
+                  f"({time.perf_counter() - start:.1f}s)")
+
+@cli.command()
+@click.option('--index', 'index_dir', type=click.Path(exists=True), default='data/index',
+              help='Index directory')
+@click.option('--query', required=True, help='Topic or section title')
+@click.option('-k', 'k', type=int, default=5, help='Number of passages')
+def search(index_dir, query, k):
+    """Show the corpus passages retrieved for a query."""
+    from ..analysis.exemplar_index import ExemplarIndex
+    
+    with ExemplarIndex(Path(index_dir)) as exemplar_index:
+        start = time.perf_counter()
+        hits = exemplar_index.search(query, k)
+        elapsed = (time.perf_counter() - start) * 1000
+    
+    for hit in hits:
+        console.print(f"[cyan]{hit['score']:.2f}[/] [dim]{hit['source']}[/]")
+        console.print(f"  {hit['text'][:300]}\n")
+    console.print(f"{len(hits)} of {exemplar_index.count} paragraphs in {elapsed:.1f} ms")
+
+def _exemplars(index_dir, query: str, k: int) -> list:
+    """Passage texts for query, or [] when no index is given."""
+    if not index_dir:
+        return []
+    from ..analysis.exemplar_index import ExemplarIndex
+    with ExemplarIndex(Path(index_dir)) as exemplar_index:
+        return [hit["text"] for hit in exemplar_index.search(query, k)]
+
 @cli.command()
 @click.option('--profile', type=click.Path(exists=True), required=True, help='Profile JSON file')
 def inspect(profile):
@@ -81,55 +229,87 @@ def inspect(profile):
 @click.option('--topic', required=True, help='Article topic')
 @click.option('--model', default='mock', help='LLM model (gpt-4, gemini-pro, claude-3, mock)')
 @click.option('--out', type=click.Path(), default='out/outline.json', help='Output file')
-def generate_outline(profile, topic, model, out):
+@click.option('--stream/--no-stream', default=False, help='Print the response as it arrives')
+@click.option('--index', 'index_dir', type=click.Path(exists=True), default=None,
+              help='Exemplar index for few-shot corpus passages')
+@click.option('--exemplars', type=int, default=5, help='Passages to retrieve')
+@click.option('--exemplar-tokens', type=int, default=1500, help='Token budget for passages')
+def generate_outline(profile, topic, model, out, stream, index_dir, exemplars, exemplar_tokens):
     """Generate article outline using LLM."""
-    from ..prompts.templates import PromptTemplates
-    from ..llm.adapter import LLMAdapter
-    
-    # Load profile
-    with open(profile, 'r', encoding='utf-8') as f:
-        profile_data = json.load(f)
-    
     console.print(f"[bold blue]Generating outline for: {topic}[/]")
     console.print(f"Model: {model}")
     
-    # Generate prompt
-    prompt = PromptTemplates.get_outline_prompt(topic, profile_data)
-    
-    # Get LLM response
-    llm = LLMAdapter(model=model)
-    response = llm.generate(prompt, max_tokens=3000, json_mode=True)
-    
-    # Save
     out_path = Path(out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    try:
-        outline = json.loads(response)
-        with open(out_path, 'w', encoding='utf-8') as f:
-            json.dump(outline, f, indent=2, ensure_ascii=False)
+    client = _client()
+    # Sunucu yanıtı tek parça döner; --stream yalnızca yerelde geçerli
+    _local_only(client, stream=stream)
+    if client:
+        result = _remote(client, "generate_outline", profile=_abs(profile), topic=topic,
+                         model=model, out=_abs(out), index=_abs(index_dir),
+                         exemplars=exemplars, exemplar_tokens=exemplar_tokens)
+    else:
+        from ..llm.adapter import LLMAdapter, StreamError
+        from ..llm.outline import draft_outline
+        
+        with open(profile, 'r', encoding='utf-8') as f:
+            profile_data = json.load(f)
         
-        console.print(f"[bold green]✓ Outline saved → {out_path}[/]")
-        console.print(f"  Title: {outline.get('title', 'N/A')}")
-        console.print(f"  Sections: {len(outline.get('sections', []))}")
-    except json.JSONDecodeError:
-        # Fallback: save raw response
+        on_chunk = None
+        if stream:
+            on_chunk = lambda chunk: console.out(chunk, end="", highlight=False)
+        try:
+            result = draft_outline(
+                LLMAdapter(model=model), topic, profile_data,
+                exemplars=_exemplars(index_dir, topic, exemplars), exemplar_tokens=exemplar_tokens,
+                on_chunk=on_chunk
+            )
+        except StreamError as e:
+            # Yarım yanıt taslak olarak kaydedilmez
+            console.out("")
+            raise click.ClickException(str(e))
+        if stream:
+            console.out("")
+        
+        out_path.parent.mkdir(parents=True, exist_ok=True)
         with open(out_path, 'w', encoding='utf-8') as f:
-            f.write(response)
+            if result["outline"] is None:
+                # Fallback: save raw response
+                f.write(result["raw"])
+            else:
+                json.dump(result["outline"], f, indent=2, ensure_ascii=False)
+    
+    outline = result["outline"]
+    if outline is None:
         console.print(f"[yellow]⚠ Response not JSON, saved raw → {out_path}[/]")
+        return
+    
+    if result["repaired"]:
+        console.print(f"[yellow]⚠ Re-requested invalid fields: {', '.join(result['repaired'])}[/]")
+    console.print(f"[bold green]✓ Outline saved → {out_path}[/]")
+    console.print(f"  Title: {outline.get('title', 'N/A')}")
+    console.print(f"  Sections: {len(outline.get('sections', []))}")
+    if result["invalid"]:
+        console.print(f"[yellow]⚠ Still invalid: {', '.join(result['invalid'])}[/]")
 
 @cli.command()
 @click.option('--profile', type=click.Path(exists=True), required=True)
 @click.option('--topic', required=True)
 @click.option('--out', type=click.Path(), default='out/prompts.txt')
-def save_prompts(profile, topic, out):
+@click.option('--index', 'index_dir', type=click.Path(exists=True), default=None,
+              help='Exemplar index for few-shot corpus passages')
+@click.option('--exemplars', type=int, default=5, help='Passages to retrieve')
+@click.option('--exemplar-tokens', type=int, default=1500, help='Token budget for passages')
+def save_prompts(profile, topic, out, index_dir, exemplars, exemplar_tokens):
     """Save generated prompts to file (no LLM call)."""
     from ..prompts.templates import PromptTemplates
     
     with open(profile, 'r', encoding='utf-8') as f:
         profile_data = json.load(f)
     
-    outline_prompt = PromptTemplates.get_outline_prompt(topic, profile_data)
+    outline_prompt = PromptTemplates.get_outline_prompt(
+        topic, profile_data,
+        exemplars=_exemplars(index_dir, topic, exemplars), exemplar_tokens=exemplar_tokens
+    )
     citation_prompt = PromptTemplates.get_citation_prompt(profile_data, topic)
     
     out_path = Path(out)
@@ -150,8 +330,19 @@ def save_prompts(profile, topic, out):
 @cli.command()
 @click.option('--outline', type=click.Path(exists=True), required=True, help='Outline JSON file')
 @click.option('--out', type=click.Path(), default='out/article_draft.docx', help='Output DOCX file')
-def export_docx(outline, out):
+@click.option('--streaming/--no-streaming', default=False,
+              help='Stream paragraphs straight into the file (for very large drafts)')
+def export_docx(outline, out, streaming):
     """Export outline to DOCX document."""
+    client = _client()
+    if client:
+        console.print(f"[bold blue]Building DOCX from outline (server)...[/]")
+        result = _remote(client, "export_docx", outline=_abs(outline), out=_abs(out),
+                         streaming=streaming)
+        console.print(f"[bold green]✓ Document saved → {out}[/]")
+        console.print(f"  Title: {result['title']}")
+        return
+    
     from ..export.docx_builder import DocxBuilder
     
     # Load outline
@@ -161,15 +352,164 @@ def export_docx(outline, out):
     console.print(f"[bold blue]Building DOCX from outline...[/]")
     
     # Build document
-    builder = DocxBuilder()
+    out_path = Path(out)
+    if streaming:
+        from ..export.ooxml_stream import StreamingDocxBuilder
+        builder = StreamingDocxBuilder(out_path)
+    else:
+        builder = DocxBuilder()
     doc = builder.build_from_outline(outline_data)
     
     # Save
-    out_path = Path(out)
     builder.save(out_path)
     
     console.print(f"[bold green]✓ Document saved → {out_path}[/]")
     console.print(f"  Title: {outline_data.get('title', 'N/A')}")
 
+@cli.command()
+@click.option('--src', type=click.Path(exists=True), required=True, help='Directory of outline JSON files or JSONL')
+@click.option('--out-dir', type=click.Path(), default='out/docx', help='Output directory')
+@click.option('--workers', type=int, default=None, help='Parallel workers')
+def export_docx_batch(src, out_dir, workers):
+    """Export many outlines to DOCX in parallel."""
+    from rich.table import Table
+    
+    console.print(f"[bold blue]Building DOCX batch from {src}...[/]")
+    start = time.perf_counter()
+    client = _client()
+    _local_only(client, workers=workers)
+    if client:
+        results = _remote(client, "export_docx_batch", src=_abs(src), out_dir=_abs(out_dir))["documents"]
+    else:
+        from ..export.batch_export import export_batch
+        results = export_batch(Path(src), Path(out_dir), workers)
+    elapsed = time.perf_counter() - start
+    
+    table = Table(title="Per-document timing")
+    table.add_column("Document", style="cyan")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Status")
+    for result in sorted(results, key=lambda r: r['name']):
+        status = "[green]ok[/]" if result['error'] is None else f"[red]{result['error']}[/]"
+        table.add_row(result['name'], f"{result['seconds']:.3f}", status)
+    console.print(table)
+    
+    ok = sum(1 for r in results if r['error'] is None)
+    console.print(f"[bold green]✓ {ok}/{len(results)} documents → {out_dir} in {elapsed:.2f}s[/]")
+
+@cli.command()
+@click.option('--jobs', type=click.Path(exists=True), required=True, help='Jobs JSONL (kind, topic, [id, model, min_references])')
+@click.option('--profile', type=click.Path(exists=True), required=True, help='Style profile JSON')
+@click.option('--model', default='mock', help='Default LLM model for jobs')
+@click.option('--out', type=click.Path(), default='out/batch_results.jsonl', help='Results JSONL file')
+@click.option('--state', type=click.Path(), default='data/batch_state.db', help='Job state store')
+@click.option('--retries', type=int, default=3, help='Retries per job')
+@click.option('--concurrency', type=int, default=4, help='Concurrent requests')
+@click.option('--provider-batch/--no-provider-batch', default=False,
+              help='Use discounted asynchronous batch endpoints where available')
+def batch(jobs, profile, model, out, state, retries, concurrency, provider_batch):
+    """Run bulk outline/citation jobs with resumable state."""
+    from ..llm.batch import BatchStore, BatchRunner, load_jobs
+    from ..prompts.templates import PromptTemplates
+    
+    with open(profile, 'r', encoding='utf-8') as f:
+        profile_data = json.load(f)
+    
+    store = BatchStore(Path(state))
+    try:
+        loaded = load_jobs(Path(jobs), model=model,
+                           system=PromptTemplates.get_system_prompt(profile_data))
+        job_ids = {job["id"] for job in loaded}
+        added = store.add_jobs(loaded)
+        console.print(f"[bold blue]Batch: {added} new jobs, state → {state}[/]")
+        
+        runner = BatchRunner(store, profile_data, model=model, retries=retries,
+                             concurrency=concurrency, job_ids=job_ids)
+        in_progress = runner.collect_provider_batches()
+        if provider_batch:
+            submitted = runner.submit_provider_batches()
+            in_progress += len(submitted)
+        else:
+            runner.run()
+        
+        written = store.export(Path(out), job_ids)
+        counts = store.counts(job_ids)
+    finally:
+        store.close()
+    
+    console.print(f"[bold green]✓ {written} results → {out}[/]")
+    for status, count in sorted(counts.items()):
+        console.print(f"  {status}: {count}")
+    if in_progress:
+        console.print(f"[yellow]⚠ {in_progress} provider batches still running; re-run to collect[/]")
+
+@cli.command()
+@click.option('--metrics', type=click.Path(), default=None, help='Metrics JSONL file (default: Config.METRICS_FILE)')
+@click.option('--by', type=click.Choice(['model', 'provider']), default='model', help='Group results by')
+def stats(metrics, by):
+    """Summarise recorded LLM call metrics."""
+    from rich.table import Table
+    from ..llm.metrics import load_metrics, summarize
+    
+    metrics_path = Path(metrics) if metrics else Config.METRICS_FILE
+    if not metrics_path.exists():
+        console.print(f"[yellow]⚠ No metrics recorded yet ({metrics_path})[/]")
+        return
+    
+    summary = summarize(load_metrics(metrics_path), by=by)
+    
+    table = Table(title=f"LLM calls by {by}")
+    table.add_column(by.capitalize(), style="cyan")
+    for column in ("Calls", "Errors", "Retries", "Cache hits", "p50 s", "p90 s", "p99 s",
+                   "TTFT p50 s", "Avg prompt tok", "Max prompt tok", "Cost $"):
+        table.add_column(column, justify="right")
+    
+    for key, row in summary.items():
+        table.add_row(
+            key,
+            str(row['calls']),
+            str(row['errors']),
+            str(row['retries']),
+            str(row['cache_hits']),
+            f"{row['latency_p50']:.2f}",
+            f"{row['latency_p90']:.2f}",
+            f"{row['latency_p99']:.2f}",
+            f"{row['ttft_p50']:.2f}",
+            f"{row['prompt_tokens_avg']:.0f}",
+            str(row['prompt_tokens_max']),
+            f"{row['cost']:.4f}",
+        )
+    
+    console.print(table)
+
+@cli.command()
+@click.option('--listen', default=None,
+              help='unix:/path or host:port (default: ARTW_SERVER or unix:<DATA_DIR>/artw.sock); '
+                   'TCP requires ARTW_SERVER_TOKEN')
+@click.option('--workers', type=int, default=None, help='Warm pool size')
+@click.option('--allow-remote', is_flag=True, help='Allow listening on non-loopback TCP hosts')
+@click.option('--status', 'show_status', is_flag=True, help='Query a running daemon instead')
+def serve(listen, workers, allow_remote, show_status):
+    """Run a resident daemon that keeps profiles, indexes, clients and workers warm."""
+    from ..server import ServerClient, ServerError, default_address, serve as run_server
+    
+    address = listen or click.get_current_context().find_root().obj.get("server") \
+        or Config.SERVER or default_address()
+    if show_status:
+        try:
+            status = ServerClient(address, timeout=5).status()
+        except ServerError as e:
+            raise click.ClickException(str(e))
+        for key, value in status.items():
+            console.print(f"  {key}: {value}")
+        return
+    
+    console.print(f"[bold blue]artw serve on {address} (Ctrl-C to stop)[/]")
+    console.print(f"[dim]Clients: artw --server {address} <command>, or ARTW_SERVER={address}[/]")
+    try:
+        run_server(address, workers, allow_remote)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
 if __name__ == "__main__":
     cli()
@@ -1,31 +1,69 @@
 ﻿"""Configuration management."""
 from pathlib import Path
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+_env_loaded = False
+
+
+def load_env():
+    """Load .env once, on first configuration access."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+class _Env:
+    """Config attribute read from the environment on first access.
+    
+    The value replaces the descriptor on the class afterwards, so later
+    reads are plain attribute lookups and tests can still assign to it.
+    """
+    
+    def __init__(self, name: str, default: str, cast=str):
+        self.name = name
+        self.default = default
+        self.cast = cast
+    
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+    
+    def __get__(self, instance, owner):
+        load_env()
+        value = self.cast(os.getenv(self.name, self.default))
+        setattr(owner, self.attr, value)
+        return value
+
+
+def _flag(value: str) -> bool:
+    return value.lower() == "true"
+
 
 class Config:
     """Global configuration."""
     
     # API Keys
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+    OPENAI_API_KEY = _Env("OPENAI_API_KEY", "")
+    GEMINI_API_KEY = _Env("GEMINI_API_KEY", "")
+    ANTHROPIC_API_KEY = _Env("ANTHROPIC_API_KEY", "")
     
     # Paths
-    CORPUS_DIR = Path(os.getenv("CORPUS_DIR", "C:/Korpus"))
+    CORPUS_DIR = _Env("CORPUS_DIR", "C:/Korpus", Path)
     DATA_DIR = Path("data")
     OUT_DIR = Path("out")
     
     # Processing
-    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "6"))
-    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    
-    @classmethod
-    def ensure_dirs(cls):
-        """Create necessary directories."""
-        cls.DATA_DIR.mkdir(exist_ok=True)
-        cls.OUT_DIR.mkdir(exist_ok=True)
-        (cls.OUT_DIR / "prompts").mkdir(exist_ok=True)
+    MAX_WORKERS = _Env("MAX_WORKERS", "6", int)
+    CACHE_ENABLED = _Env("CACHE_ENABLED", "true", _flag)
+    LOG_LEVEL = _Env("LOG_LEVEL", "INFO")
+    LOG_DEBUG_RATE = _Env("LOG_DEBUG_RATE", "20", int)  # DEBUG kayıt/sn, worker başına
+    
+    # artw serve adresi; doluysa komutlar bu daemon'a iletilir (host:port veya unix:/yol)
+    SERVER = _Env("ARTW_SERVER", "")
+    # TCP üzerinden sunucu ile istemcinin paylaştığı anahtar (X-Artw-Token başlığı)
+    SERVER_TOKEN = _Env("ARTW_SERVER_TOKEN", "")
+    
+    # LLM call metrics
+    METRICS_ENABLED = _Env("METRICS_ENABLED", "true", _flag)
+    METRICS_FILE = _Env("METRICS_FILE", "data/llm_metrics.jsonl", Path)
@@ -0,0 +1,210 @@
+﻿"""Parallel DOCX export of many outlines."""
+from pathlib import Path
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
+import re
+import time
+import jsonlines
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
+from .docx_builder import DocxBuilder, base_template
+from .. import tracing
+from ..config import Config
+from ..logger import logger, init_worker_logging, worker_logging
+
+# Worker sürecinde bir kez yüklenen stil şablonu
+_worker_template: Optional[bytes] = None
+
+
+def init_worker(template: bytes, log_queue, debug_rate: int):
+    """Keep the pre-styled base document in each worker process."""
+    global _worker_template
+    _worker_template = template
+    init_worker_logging(log_queue, debug_rate)
+
+
+def _safe_name(name: str) -> str:
+    """Turn an outline id/title into a file name."""
+    name = re.sub(r'[<>:"/\\|?*\s]+', '_', name).strip('._')
+    return name[:80] or "document"
+
+
+def _skipped(name: str, reason: str) -> Dict:
+    """Result entry (see build_document) for a record that is not exported."""
+    return {"name": name, "path": None, "seconds": 0.0, "error": f"skipped: {reason}"}
+
+
+def _read_records(reader: jsonlines.Reader) -> Iterator[Tuple[int, Any]]:
+    """(line number, record) pairs; records that are not valid JSON are None."""
+    lineno = 0
+    while True:
+        try:
+            record = reader.read(skip_empty=True)
+        except EOFError:
+            return
+        except jsonlines.InvalidLineError as e:
+            lineno = e.lineno
+            yield lineno, None
+            continue
+        lineno += 1
+        yield lineno, record
+
+
+def load_outlines(src: Path) -> Tuple[List[Tuple[str, Dict]], List[Dict]]:
+    """
+    Collect outlines from a directory of JSON files or a JSONL file.
+
+    Args:
+        src: Directory (``*.json``) or JSONL file, one outline per line;
+            ``artw batch`` output is accepted and only its finished outline
+            jobs are used
+
+    Returns:
+        (outlines, skipped): (name, outline) pairs, whose names come from the
+        file stem, or for JSONL from ``id``/``title`` with the line number as
+        fallback; and result entries for records that are not outlines
+        (invalid JSON, failed or citation batch jobs, non-object lines)
+    """
+    outlines = []
+    skipped = []
+    if src.is_dir():
+        for path in sorted(src.glob("*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    outline = json.load(f)
+            except json.JSONDecodeError:
+                # generate-outline, ayrıştıramadığı yanıtı ham metin olarak kaydeder
+                skipped.append(_skipped(path.stem, "invalid JSON"))
+                continue
+            if isinstance(outline, dict):
+                outlines.append((path.stem, outline))
+            else:
+                skipped.append(_skipped(path.stem, "not an outline object"))
+    else:
+        with jsonlines.open(src) as reader:
+            for lineno, record in _read_records(reader):
+                if record is None:
+                    skipped.append(_skipped(f"line-{lineno}", "invalid JSON"))
+                    continue
+                if not isinstance(record, dict):
+                    skipped.append(_skipped(f"line-{lineno}", "not an outline object"))
+                    continue
+                name = record.get("id")
+                outline = record
+                # artw batch çıktısı: taslak "result" alanında, yalnızca bitmiş işler
+                if "status" in record and "result" in record:
+                    label = _safe_name(str(name or f"line-{lineno}"))
+                    if record["status"] != "done":
+                        skipped.append(_skipped(label, f"job {record['status']}"))
+                        continue
+                    if not isinstance(record["result"], dict):
+                        skipped.append(_skipped(label, f"{record.get('kind', 'job')} result is not an outline"))
+                        continue
+                    outline = record["result"]
+                name = name or outline.get("title") or f"outline-{lineno}"
+                outlines.append((_safe_name(str(name)), outline))
+
+    # Aynı isimli çıktılar birbirini ezmesin
+    seen: Dict[str, int] = {}
+    unique = []
+    for name, outline in outlines:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append((name if seen[name] == 1 else f"{name}-{seen[name]}", outline))
+    return unique, skipped
+
+
+def build_document(name: str, outline: Dict, out_dir: Path) -> Dict:
+    """
+    Build and save one document from the worker's base template.
+
+    Returns:
+        Dict with name, path, seconds and error (None on success)
+    """
+    start = time.perf_counter()
+    out_path = out_dir / f"{name}.docx"
+    try:
+        builder = DocxBuilder(template=_worker_template)
+        builder.build_from_outline(outline)
+        builder.save(out_path)
+        error = None
+    except Exception as e:
+        logger.error(f"Failed to export {name}: {e}")
+        error = str(e)
+    return {
+        "name": name,
+        "path": str(out_path),
+        "seconds": time.perf_counter() - start,
+        "error": error,
+    }
+
+
+def _build_traced(name: str, outline: Dict, out_dir: Path):
+    """Worker task used when tracing: returns the result and the worker's spans."""
+    return tracing.run_in_worker(build_document, name, outline, out_dir)
+
+
+def export_batch(
+    src: Path,
+    out_dir: Path,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> List[Dict]:
+    """
+    Export many outlines to DOCX in parallel.
+
+    Args:
+        src: Directory of outline JSON files or a JSONL file
+        out_dir: Output directory for .docx files
+        workers: Number of parallel workers
+        executor: Existing process pool whose workers ran init_worker;
+            workers is then ignored
+
+    Returns:
+        Per-document results (see build_document), in completion order,
+        followed by entries for skipped records
+    """
+    workers = workers or Config.MAX_WORKERS
+    outlines, skipped = load_outlines(src)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Exporting {len(outlines)} outlines with {workers} workers")
+    if skipped:
+        logger.warning(f"Skipping {len(skipped)} records that are not finished outlines")
+
+    results = []
+    traced = tracing.enabled()
+    task_fn = _build_traced if traced else build_document
+
+    with tracing.span("export.batch", documents=len(outlines), workers=workers), Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+    ) as progress:
+        task = progress.add_task("Building DOCX...", total=len(outlines))
+
+        with ExitStack() as stack:
+            if executor is None:
+                _, log_args = stack.enter_context(worker_logging())
+                executor = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=init_worker,
+                    initargs=(base_template(), *log_args)
+                ))
+            futures = [
+                executor.submit(task_fn, name, outline, out_dir)
+                for name, outline in outlines
+            ]
+
+            for future in as_completed(futures):
+                result = future.result()
+                if traced:
+                    result, events = result
+                    tracing.add_events(events)
+                results.append(result)
+                progress.update(task, advance=1)
+
+    ok = sum(1 for r in results if r["error"] is None)
+    logger.info(f"Exported {ok}/{len(outlines)} documents")
+    return results + skipped
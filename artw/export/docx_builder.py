@@ -1,18 +1,28 @@
 ﻿"""DOCX document builder."""
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+from io import BytesIO
 import json
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from ..tracing import traced
 from ..logger import logger
 
 class DocxBuilder:
     """Build DOCX documents from outline."""
     
-    def __init__(self):
-        self.doc = Document()
-        self._setup_styles()
+    def __init__(self, template: Optional[bytes] = None):
+        """
+        Args:
+            template: Serialized pre-styled document (see base_template);
+                styles are applied from scratch when omitted
+        """
+        if template:
+            self.doc = Document(BytesIO(template))
+        else:
+            self.doc = Document()
+            self._setup_styles()
     
     def _setup_styles(self):
         """Setup document styles."""
@@ -30,6 +40,7 @@ class DocxBuilder:
             font.size = Pt(14 - i)
             font.bold = True
     
+    @traced("docx.build")
     def build_from_outline(self, outline: Dict) -> Document:
         """
         Build document from outline JSON.
@@ -40,6 +51,19 @@ class DocxBuilder:
         Returns:
             Document object
         """
+        self._add_front_matter(outline)
+        
+        # Sections
+        for section in outline.get('sections', []):
+            self._add_section(section)
+        
+        # References
+        self._add_references(outline.get('references', []))
+        
+        return self.doc
+    
+    def _add_front_matter(self, outline: Dict):
+        """Add title, abstracts and keywords."""
         # Title
         title = self.doc.add_heading(outline.get('title', 'Başlık'), 0)
         title.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -67,15 +91,6 @@ class DocxBuilder:
         p.add_run(keywords_en).italic = True
         
         self.doc.add_page_break()
-        
-        # Sections
-        for section in outline.get('sections', []):
-            self._add_section(section)
-        
-        # References
-        self._add_references(outline.get('references', []))
-        
-        return self.doc
     
     def _add_section(self, section: Dict):
         """Add a section to document."""
@@ -120,8 +135,22 @@ class DocxBuilder:
                 citation = ref.get('apa_citation', ref.get('citation', ''))
                 self.doc.add_paragraph(citation, style='Normal')
     
+    @traced("docx.save")
     def save(self, path: Path):
         """Save document to file."""
         path.parent.mkdir(parents=True, exist_ok=True)
         self.doc.save(str(path))
         logger.info(f"Document saved to {path}")
+
+
+_BASE_TEMPLATE: Optional[bytes] = None
+
+
+def base_template() -> bytes:
+    """Empty document with DocxBuilder styles applied, built once per process."""
+    global _BASE_TEMPLATE
+    if _BASE_TEMPLATE is None:
+        buffer = BytesIO()
+        DocxBuilder().doc.save(buffer)
+        _BASE_TEMPLATE = buffer.getvalue()
+    return _BASE_TEMPLATE
@@ -0,0 +1,176 @@
+﻿"""Streaming OOXML writer for very large generated documents."""
+from pathlib import Path
+from typing import Dict, List, Optional
+from io import BytesIO
+from xml.sax.saxutils import escape
+import re
+import zipfile
+from .docx_builder import DocxBuilder, base_template
+from ..tracing import traced
+from ..logger import logger
+
+# XML 1.0'da izin verilmeyen kontrol karakterleri
+_INVALID_XML = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_ALIGNMENTS = {0: "left", 1: "center", 2: "right", 3: "both"}
+
+
+def _text_runs(text: str) -> str:
+    """Run content for text, mapping newlines/tabs like python-docx does."""
+    parts = []
+    for piece in re.split(r'(\n|\t)', _INVALID_XML.sub('', text)):
+        if piece == "\n":
+            parts.append('<w:br/>')
+        elif piece == "\t":
+            parts.append('<w:tab/>')
+        elif piece:
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return "".join(parts)
+
+
+class StreamRun:
+    """Minimal stand-in for docx.text.run.Run."""
+
+    def __init__(self, text: str = ""):
+        self.text = text
+        self.bold: Optional[bool] = None
+        self.italic: Optional[bool] = None
+
+    def to_xml(self) -> str:
+        props = ""
+        if self.bold is not None:
+            props += '<w:b/>' if self.bold else '<w:b w:val="0"/>'
+        if self.italic is not None:
+            props += '<w:i/>' if self.italic else '<w:i w:val="0"/>'
+        rpr = f'<w:rPr>{props}</w:rPr>' if props else ''
+        return f'<w:r>{rpr}{_text_runs(self.text)}</w:r>'
+
+
+class StreamParagraph:
+    """Minimal stand-in for docx.text.paragraph.Paragraph."""
+
+    def __init__(self, style: Optional[str] = None):
+        self.style = style
+        self.alignment = None
+        self.runs: List[StreamRun] = []
+        self.page_break = False
+
+    def add_run(self, text: str = "") -> StreamRun:
+        run = StreamRun(text)
+        self.runs.append(run)
+        return run
+
+    def to_xml(self) -> str:
+        props = ""
+        if self.style and self.style != "Normal":
+            # Yerleşik stillerde style id, boşluksuz isimdir ("Heading 1" -> "Heading1")
+            props += f'<w:pStyle w:val="{self.style.replace(" ", "")}"/>'
+        if self.alignment is not None:
+            value = getattr(self.alignment, "xml_value", None) or _ALIGNMENTS.get(int(self.alignment))
+            props += f'<w:jc w:val="{value}"/>'
+        ppr = f'<w:pPr>{props}</w:pPr>' if props else ''
+        if self.page_break:
+            return f'<w:p>{ppr}<w:r><w:br w:type="page"/></w:r></w:p>'
+        return f'<w:p>{ppr}{"".join(run.to_xml() for run in self.runs)}</w:p>'
+
+
+class OOXMLStreamWriter:
+    """Write word/document.xml into the .docx zip one paragraph at a time.
+
+    Exposes the subset of the python-docx Document API that DocxBuilder
+    uses (add_heading, add_paragraph, add_page_break, save). Only the most
+    recent paragraph is held in memory, so callers can still set runs or
+    alignment on it; everything before is already compressed on disk.
+    """
+
+    def __init__(self, path: Path, template: Optional[bytes] = None):
+        template = template or base_template()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.paragraph_count = 0
+        self._pending: Optional[StreamParagraph] = None
+
+        with zipfile.ZipFile(BytesIO(template)) as source:
+            document_xml = source.read("word/document.xml").decode("utf-8")
+            self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+            # Stiller, tema, ayarlar vb. şablondan aynen kopyalanır
+            for item in source.infolist():
+                if item.filename != "word/document.xml":
+                    self._zip.writestr(item, source.read(item.filename))
+
+        body_open = document_xml.index("<w:body>") + len("<w:body>")
+        sect_pr = re.search(r'<w:sectPr[\s>].*?</w:sectPr>|<w:sectPr[^>]*/>', document_xml, re.S)
+        self._tail = (sect_pr.group(0) if sect_pr else "") + "</w:body></w:document>"
+
+        self._stream = self._zip.open("word/document.xml", "w")
+        self._stream.write(document_xml[:body_open].encode("utf-8"))
+
+    def _flush(self):
+        if self._pending is not None:
+            self._stream.write(self._pending.to_xml().encode("utf-8"))
+            self.paragraph_count += 1
+            self._pending = None
+
+    def add_paragraph(self, text: str = "", style: Optional[str] = None) -> StreamParagraph:
+        self._flush()
+        self._pending = StreamParagraph(style)
+        if text:
+            self._pending.add_run(text)
+        return self._pending
+
+    def add_heading(self, text: str = "", level: int = 1) -> StreamParagraph:
+        style = "Title" if level == 0 else f"Heading {level}"
+        return self.add_paragraph(text, style)
+
+    def add_page_break(self) -> StreamParagraph:
+        paragraph = self.add_paragraph()
+        paragraph.page_break = True
+        return paragraph
+
+    def save(self, path: Optional[str] = None):
+        """Finish the document part and close the zip (path is fixed at creation)."""
+        if self._zip is None:
+            return
+        self._flush()
+        self._stream.write(self._tail.encode("utf-8"))
+        self._stream.close()
+        self._zip.close()
+        self._zip = None
+
+
+class StreamingDocxBuilder(DocxBuilder):
+    """DocxBuilder backend that streams paragraphs straight into the .docx.
+
+    Produces the same headings, runs, page breaks and styles as DocxBuilder,
+    and also accepts sections one at a time:
+
+        builder = StreamingDocxBuilder(path)
+        builder.add_front_matter(outline)
+        for section in sections_as_they_arrive:
+            builder.add_section(section)
+        builder.finish(references)
+    """
+
+    def __init__(self, path: Path, template: Optional[bytes] = None):
+        self.path = path
+        self.doc = OOXMLStreamWriter(path, template)
+
+    def add_front_matter(self, outline: Dict):
+        """Write title, abstracts and keywords."""
+        self._add_front_matter(outline)
+
+    def add_section(self, section: Dict):
+        """Write one section as soon as it is available."""
+        self._add_section(section)
+
+    def finish(self, references: Optional[List] = None):
+        """Write the references and close the file."""
+        self._add_references(references or [])
+        self.save()
+
+    @traced("docx.save")
+    def save(self, path: Optional[Path] = None):
+        """Close the streamed document (it is always written to self.path)."""
+        if path is not None and Path(path) != self.path:
+            raise ValueError(f"Streaming document is written to {self.path}, not {path}")
+        self.doc.save()
+        logger.info(f"Document saved to {self.path} ({self.doc.paragraph_count} paragraphs)")
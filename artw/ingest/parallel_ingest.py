@@ -1,18 +1,33 @@
 ﻿"""Parallel corpus ingestion."""
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from typing import Optional
+import pickle
 import jsonlines
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn
 from .pdf_parser import extract_text_from_pdf
+from .. import tracing
 from ..config import Config
-from ..logger import logger
+from ..logger import logger, worker_logging
+
+
+def _extract_traced(pdf_path: Path):
+    """Worker task used when tracing: also times pickling of the result."""
+    def task():
+        result = extract_text_from_pdf(pdf_path)
+        with tracing.span("ingest.pickle", file=pdf_path.name):
+            pickle.dumps(result)
+        return result
+    return tracing.run_in_worker(task)
+
 
 def ingest_corpus(
     src_dir: Path,
     out_file: Path,
     sample: Optional[int] = None,
-    workers: Optional[int] = None
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None
 ) -> int:
     """
     Ingest PDF corpus in parallel.
@@ -22,6 +37,9 @@ def ingest_corpus(
         out_file: Output JSONL file
         sample: Limit to N files (for testing)
         workers: Number of parallel workers
+        executor: Existing process pool to use instead of starting one
+            (its workers must already forward their logs); workers is
+            then ignored
         
     Returns:
         Number of successfully processed files
@@ -36,8 +54,10 @@ def ingest_corpus(
     logger.info(f"Found {len(pdf_files)} PDF files")
     
     processed = 0
+    traced = tracing.enabled()
+    task_fn = _extract_traced if traced else extract_text_from_pdf
     
-    with Progress(
+    with tracing.span("ingest", files=len(pdf_files), workers=workers), Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
@@ -45,16 +65,25 @@ def ingest_corpus(
     ) as progress:
         task = progress.add_task("Processing PDFs...", total=len(pdf_files))
         
-        with jsonlines.open(out_file, mode='w') as writer:
-            with ProcessPoolExecutor(max_workers=workers) as executor:
-                futures = {executor.submit(extract_text_from_pdf, pdf): pdf for pdf in pdf_files}
-                
-                for future in as_completed(futures):
-                    result = future.result()
-                    if result:
+        with ExitStack() as stack:
+            writer = stack.enter_context(jsonlines.open(out_file, mode='w'))
+            if executor is None:
+                init, initargs = stack.enter_context(worker_logging())
+                executor = stack.enter_context(
+                    ProcessPoolExecutor(max_workers=workers, initializer=init, initargs=initargs)
+                )
+            futures = {executor.submit(task_fn, pdf): pdf for pdf in pdf_files}
+            
+            for future in as_completed(futures):
+                result = future.result()
+                if traced:
+                    result, events = result
+                    tracing.add_events(events)
+                if result:
+                    with tracing.span("ingest.write", file=futures[future].name):
                         writer.write(result)
-                        processed += 1
-                    progress.update(task, advance=1)
+                    processed += 1
+                progress.update(task, advance=1)
     
     logger.info(f"Successfully processed {processed}/{len(pdf_files)} files")
     return processed
@@ -1,7 +1,7 @@
 ﻿"""PDF text extraction."""
 from pathlib import Path
-import fitz  # PyMuPDF
 from typing import Dict, Optional
+from ..tracing import span
 from ..logger import logger
 
 def extract_text_from_pdf(pdf_path: Path) -> Optional[Dict]:
@@ -14,22 +14,26 @@ def extract_text_from_pdf(pdf_path: Path) -> Optional[Dict]:
     Returns:
         Dict with text, metadata, or None if failed
     """
+    import fitz  # PyMuPDF; yalnızca worker süreçlerinde gerekir
+    
     try:
-        doc = fitz.open(pdf_path)
-        
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        
-        metadata = {
-            "filename": pdf_path.name,
-            "pages": doc.page_count,
-            "author": doc.metadata.get("author", ""),
-            "title": doc.metadata.get("title", ""),
-        }
-        
-        doc.close()
+        with span("pdf.extract", file=pdf_path.name):
+            doc = fitz.open(pdf_path)
+            
+            text = ""
+            for page in doc:
+                text += page.get_text()
+            
+            metadata = {
+                "filename": pdf_path.name,
+                "pages": doc.page_count,
+                "author": doc.metadata.get("author", ""),
+                "title": doc.metadata.get("title", ""),
+            }
+            
+            doc.close()
         
+        logger.debug(f"Extracted {pdf_path.name}: {metadata['pages']} pages, {len(text)} chars")
         return {
             "text": text.strip(),
             "metadata": metadata,
@@ -1,16 +1,26 @@
 ﻿"""LLM API adapter with multi-model support."""
 import os
 import json
-from typing import Dict, Optional
+import time
+from typing import Dict, Iterator, Optional
 from ..config import Config
+from ..tracing import span
 from ..logger import logger
+from .metrics import MetricsRecorder, estimate_cost, get_recorder
+
+class StreamError(RuntimeError):
+    """Provider failed after part of a streamed response was delivered."""
+
 
 class LLMAdapter:
     """Unified interface for different LLM providers."""
     
-    def __init__(self, model: str = "gpt-4"):
+    def __init__(self, model: str = "gpt-4", metrics: Optional[MetricsRecorder] = None):
         self.model = model
         self.client = None
+        self.metrics = metrics or get_recorder()
+        # Gemini'de system talimatı modele bağlı; her prefix için bir model tutulur
+        self._gemini_models: Dict[str, object] = {}
         self._setup_client()
     
     def _setup_client(self):
@@ -30,6 +40,7 @@ class LLMAdapter:
                 # Model adını düzelt - API "models/" prefix istiyor
                 model_name = self.model if self.model.startswith("models/") else f"models/{self.model}"
                 self.client = genai.GenerativeModel(model_name)
+                self._gemini_model_name = model_name
                 logger.info(f"Initialized Gemini client: {model_name}")
             except ImportError:
                 logger.warning("Google AI library not installed. Run: pip install google-generativeai")
@@ -42,8 +53,21 @@ class LLMAdapter:
             except ImportError:
                 logger.warning("Anthropic library not installed. Run: pip install anthropic")
     
+    @property
+    def provider(self) -> str:
+        """Provider name used in metrics."""
+        if not self.client:
+            return "mock"
+        if self.model.startswith("gpt"):
+            return "openai"
+        if self.model.startswith("gemini"):
+            return "gemini"
+        return "anthropic"
+    
     def generate(self, prompt: str, max_tokens: int = 4000, 
-                temperature: float = 0.7, json_mode: bool = False) -> str:
+                temperature: float = 0.7, json_mode: bool = False,
+                system: Optional[str] = None, fallback: bool = True,
+                tags: Optional[Dict] = None) -> str:
         """
         Generate text from prompt.
         
@@ -52,42 +76,223 @@ class LLMAdapter:
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             json_mode: Force JSON output
+            system: Static prefix sent as a cacheable system message
+            fallback: Return the mock response on provider errors instead of raising
+            tags: Extra fields for the metrics record (e.g. retries, job id)
             
         Returns:
             Generated text
         """
+        usage: Dict = {}
+        start = time.perf_counter()
+        
         if not self.client:
-            return self._mock_response(prompt, json_mode)
+            response = self._mock_response(prompt, json_mode)
+            self._mock_usage(usage, prompt, response, system)
+            self._record_call(start, usage, tags)
+            return response
         
         try:
-            if self.model.startswith("gpt"):
-                return self._generate_openai(prompt, max_tokens, temperature, json_mode)
-            elif self.model.startswith("gemini"):
-                return self._generate_gemini(prompt, max_tokens, temperature, json_mode)
-            elif self.model.startswith("claude"):
-                return self._generate_claude(prompt, max_tokens, temperature)
+            with span("llm.generate", model=self.model):
+                if self.model.startswith("gpt"):
+                    response = self._generate_openai(prompt, max_tokens, temperature, json_mode, system, usage)
+                elif self.model.startswith("gemini"):
+                    response = self._generate_gemini(prompt, max_tokens, temperature, json_mode, system, usage)
+                elif self.model.startswith("claude"):
+                    response = self._generate_claude(prompt, max_tokens, temperature, system, usage)
         except Exception as e:
+            self._record_call(start, usage, tags, error=str(e))
+            if not fallback:
+                raise
             logger.error(f"Generation failed: {e}")
             return self._mock_response(prompt, json_mode)
+        
+        self._record_call(start, usage, tags)
+        return response
     
-    def _generate_openai(self, prompt: str, max_tokens: int, 
-                        temperature: float, json_mode: bool) -> str:
-        """Generate using OpenAI API."""
+    def stream(self, prompt: str, max_tokens: int = 4000,
+               temperature: float = 0.7, json_mode: bool = False,
+               system: Optional[str] = None, tags: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Generate text from prompt, yielding chunks as they arrive.
+        
+        Args:
+            prompt: The prompt text
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            json_mode: Force JSON output
+            system: Static prefix sent as a cacheable system message
+            tags: Extra fields for the metrics record
+            
+        Yields:
+            Text chunks in arrival order; a provider error before the first
+            chunk falls back to the mock response
+            
+        Raises:
+            StreamError: The provider failed after some chunks were yielded
+        """
+        usage: Dict = {}
+        start = time.perf_counter()
+        ttft = None
+        error = None
+        
+        with span("llm.stream", model=self.model):
+            try:
+                if not self.client:
+                    chunks = self._mock_stream(prompt, json_mode)
+                    self._mock_usage(usage, prompt, self._mock_response(prompt, json_mode), system)
+                elif self.model.startswith("gpt"):
+                    chunks = self._stream_openai(prompt, max_tokens, temperature, json_mode, system, usage)
+                elif self.model.startswith("gemini"):
+                    chunks = self._stream_gemini(prompt, max_tokens, temperature, json_mode, system, usage)
+                else:
+                    chunks = self._stream_claude(prompt, max_tokens, temperature, system, usage)
+                
+                for chunk in chunks:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    yield chunk
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Streaming failed: {e}")
+                # Yarım kalan yanıt tamamlanmış gibi görünmesin; mock da eklenmez
+                if ttft is not None:
+                    raise StreamError(f"Stream interrupted after partial output: {e}") from e
+                yield from self._mock_stream(prompt, json_mode)
+            finally:
+                # Tüketici akışı erken bıraksa da (break) kayıt düşülür
+                self._record_call(start, usage, tags, ttft=ttft, error=error, streamed=True)
+    
+    def _record_call(self, start: float, usage: Dict, tags: Optional[Dict],
+                     ttft: Optional[float] = None, error: Optional[str] = None,
+                     streamed: bool = False):
+        """Write one metrics record for a finished call."""
+        if not self.metrics:
+            return
+        
+        latency = time.perf_counter() - start
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = usage.get("cached_tokens", 0)
+        
+        entry = {
+            "timestamp": time.time(),
+            "provider": self.provider,
+            "model": self.model,
+            "streamed": streamed,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cache_hit": cached_tokens > 0,
+            # Akış yoksa ilk görünür çıktı yanıtın tamamıyla gelir
+            "ttft": round(ttft if ttft is not None else latency, 4),
+            "latency": round(latency, 4),
+            "retries": 0,
+            "cost": estimate_cost(self.model, prompt_tokens, completion_tokens, cached_tokens)
+                    if self.client else 0.0,
+            "error": error,
+        }
+        entry.update(tags or {})
+        self.metrics.record(entry)
+    
+    @staticmethod
+    def _mock_usage(usage: Dict, prompt: str, response: str, system: Optional[str]):
+        """Rough token counts (~4 chars/token) so mock runs still show prompt size."""
+        usage["prompt_tokens"] = (len(prompt) + len(system or "")) // 4
+        usage["completion_tokens"] = len(response) // 4
+    
+    @staticmethod
+    def _openai_usage(usage: Dict, u):
+        usage["prompt_tokens"] = u.prompt_tokens
+        usage["completion_tokens"] = u.completion_tokens
+        details = getattr(u, "prompt_tokens_details", None)
+        usage["cached_tokens"] = getattr(details, "cached_tokens", 0) or 0
+    
+    @staticmethod
+    def _gemini_usage(usage: Dict, u):
+        usage["prompt_tokens"] = u.prompt_token_count
+        usage["completion_tokens"] = u.candidates_token_count
+        usage["cached_tokens"] = getattr(u, "cached_content_token_count", 0) or 0
+    
+    @staticmethod
+    def _claude_usage(usage: Dict, u):
+        cache_read = getattr(u, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(u, "cache_creation_input_tokens", 0) or 0
+        usage["prompt_tokens"] = u.input_tokens + cache_read + cache_write
+        usage["completion_tokens"] = u.output_tokens
+        usage["cached_tokens"] = cache_read
+    
+    def _openai_kwargs(self, prompt: str, max_tokens: int, temperature: float,
+                       json_mode: bool, system: Optional[str]) -> Dict:
+        """Build Chat Completions arguments.
+        
+        OpenAI caches identical prefixes automatically, but only from 1024
+        tokens; shorter system prompts are never cached.
+        """
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        
         kwargs = {
             "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "max_tokens": max_tokens,
             "temperature": temperature
         }
         
         if json_mode:
             kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+    
+    def _claude_kwargs(self, prompt: str, max_tokens: int, temperature: float,
+                       system: Optional[str]) -> Dict:
+        """Build Messages API arguments with the system prefix marked for caching.
         
+        Anthropic ignores cache_control on prefixes under its minimum
+        cacheable length (1024 tokens for most models), so a short system
+        prompt is sent uncached.
+        """
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if system:
+            kwargs["system"] = [{
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        return kwargs
+    
+    def _gemini_client(self, system: Optional[str]):
+        """Return a GenerativeModel carrying the given system instruction."""
+        if not system:
+            return self.client
+        if system not in self._gemini_models:
+            import google.generativeai as genai
+            self._gemini_models[system] = genai.GenerativeModel(
+                self._gemini_model_name, system_instruction=system
+            )
+        return self._gemini_models[system]
+    
+    def _generate_openai(self, prompt: str, max_tokens: int, 
+                        temperature: float, json_mode: bool,
+                        system: Optional[str] = None,
+                        usage: Optional[Dict] = None) -> str:
+        """Generate using OpenAI API."""
+        kwargs = self._openai_kwargs(prompt, max_tokens, temperature, json_mode, system)
         response = self.client.chat.completions.create(**kwargs)
+        if usage is not None and response.usage:
+            self._openai_usage(usage, response.usage)
         return response.choices[0].message.content
     
     def _generate_gemini(self, prompt: str, max_tokens: int, 
-                        temperature: float, json_mode: bool) -> str:
+                        temperature: float, json_mode: bool,
+                        system: Optional[str] = None,
+                        usage: Optional[Dict] = None) -> str:
         """Generate using Gemini API."""
         generation_config = {
             "max_output_tokens": max_tokens,
@@ -98,22 +303,79 @@ class LLMAdapter:
         if json_mode:
             prompt = prompt + "\n\nIMPORTANT: Respond ONLY with valid JSON. Do not include any text outside the JSON structure."
         
-        response = self.client.generate_content(
+        response = self._gemini_client(system).generate_content(
             prompt,
             generation_config=generation_config
         )
+        if usage is not None and response.usage_metadata:
+            self._gemini_usage(usage, response.usage_metadata)
         return response.text
     
-    def _generate_claude(self, prompt: str, max_tokens: int, temperature: float) -> str:
+    def _generate_claude(self, prompt: str, max_tokens: int, temperature: float,
+                         system: Optional[str] = None,
+                         usage: Optional[Dict] = None) -> str:
         """Generate using Anthropic Claude API."""
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        kwargs = self._claude_kwargs(prompt, max_tokens, temperature, system)
+        response = self.client.messages.create(**kwargs)
+        if usage is not None:
+            self._claude_usage(usage, response.usage)
         return response.content[0].text
     
+    def _stream_openai(self, prompt: str, max_tokens: int,
+                       temperature: float, json_mode: bool,
+                       system: Optional[str] = None,
+                       usage: Optional[Dict] = None) -> Iterator[str]:
+        """Stream using OpenAI API."""
+        kwargs = self._openai_kwargs(prompt, max_tokens, temperature, json_mode, system)
+        stream_options = {"include_usage": True}
+        for chunk in self.client.chat.completions.create(stream=True, stream_options=stream_options, **kwargs):
+            # Son parça boş choices ile yalnızca usage taşır
+            if usage is not None and chunk.usage:
+                self._openai_usage(usage, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _stream_gemini(self, prompt: str, max_tokens: int,
+                       temperature: float, json_mode: bool,
+                       system: Optional[str] = None,
+                       usage: Optional[Dict] = None) -> Iterator[str]:
+        """Stream using Gemini API."""
+        generation_config = {
+            "max_output_tokens": max_tokens,
+            "temperature": temperature
+        }
+        
+        if json_mode:
+            prompt = prompt + "\n\nIMPORTANT: Respond ONLY with valid JSON. Do not include any text outside the JSON structure."
+        
+        response = self._gemini_client(system).generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+        for chunk in response:
+            if usage is not None and chunk.usage_metadata:
+                self._gemini_usage(usage, chunk.usage_metadata)
+            # Boş (ör. güvenlik filtresi) parçalarda .text ValueError fırlatır
+            if chunk.parts:
+                yield chunk.text
+    
+    def _stream_claude(self, prompt: str, max_tokens: int, temperature: float,
+                       system: Optional[str] = None,
+                       usage: Optional[Dict] = None) -> Iterator[str]:
+        """Stream using Anthropic Claude API."""
+        kwargs = self._claude_kwargs(prompt, max_tokens, temperature, system)
+        with self.client.messages.stream(**kwargs) as stream:
+            yield from stream.text_stream
+            if usage is not None:
+                self._claude_usage(usage, stream.get_final_message().usage)
+    
+    def _mock_stream(self, prompt: str, json_mode: bool, chunk_size: int = 16) -> Iterator[str]:
+        """Stream the mock response in small chunks."""
+        response = self._mock_response(prompt, json_mode)
+        for i in range(0, len(response), chunk_size):
+            yield response[i:i + chunk_size]
+    
     def _mock_response(self, prompt: str, json_mode: bool) -> str:
         """Return mock response when no API available."""
         if json_mode:
@@ -124,3 +386,4 @@ class LLMAdapter:
                 "note": "API key missing - using mock response"
             })
         return "Mock response: API key gerekli. .env dosyasına API anahtarınızı ekleyin."
+
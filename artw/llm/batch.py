@@ -0,0 +1,401 @@
+﻿"""Resumable batch job queue for bulk LLM requests."""
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Tuple
+import jsonlines
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+from .adapter import LLMAdapter
+from .json_extract import parse_json_response, validate_outline
+from ..prompts.templates import PromptTemplates
+from ..logger import logger
+
+# Job kind -> (max_tokens, JSON opening brackets)
+JOB_KINDS = {
+    "outline": (3000, "{"),
+    "citations": (4000, "[{"),
+}
+
+
+class BatchStore:
+    """SQLite-backed job state, so interrupted runs can resume."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                provider_batch TEXT,
+                updated REAL
+            );
+            CREATE TABLE IF NOT EXISTS provider_batches (
+                id TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                status TEXT NOT NULL
+            );
+        """)
+
+    def add_jobs(self, jobs: Iterable[Dict]) -> int:
+        """Register jobs; already known ids are left untouched."""
+        added = 0
+        with self.conn:
+            for job in jobs:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO jobs (id, payload, updated) VALUES (?, ?, ?)",
+                    (job["id"], json.dumps(job, ensure_ascii=False), time.time())
+                )
+                added += cur.rowcount
+        return added
+
+    def jobs(self, *statuses: str, ids: Optional[Collection[str]] = None) -> List[Dict]:
+        """Return job payloads with the given statuses, optionally only those in ids."""
+        marks = ",".join("?" * len(statuses))
+        rows = self.conn.execute(
+            f"SELECT id, payload FROM jobs WHERE status IN ({marks}) ORDER BY rowid", statuses
+        )
+        return [json.loads(payload) for job_id, payload in rows if ids is None or job_id in ids]
+
+    def update(self, job_id: str, status: str, attempts: int = 0,
+               result: Optional[str] = None, error: Optional[str] = None,
+               provider_batch: Optional[str] = None):
+        """Record the outcome of a job."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + ?, result = ?, error = ?, "
+                "provider_batch = ?, updated = ? WHERE id = ?",
+                (status, attempts, result, error, provider_batch, time.time(), job_id)
+            )
+
+    def add_provider_batch(self, batch_id: str, model: str, job_ids: List[str]):
+        """Remember a submitted provider batch and the jobs it carries."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO provider_batches (id, model, status) VALUES (?, ?, 'submitted')",
+                (batch_id, model)
+            )
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'submitted', provider_batch = ?, updated = ? WHERE id = ?",
+                [(batch_id, time.time(), job_id) for job_id in job_ids]
+            )
+
+    def open_provider_batches(self) -> List[Tuple[str, str]]:
+        """Return (batch_id, model) for batches not yet collected."""
+        return list(self.conn.execute(
+            "SELECT id, model FROM provider_batches WHERE status = 'submitted'"
+        ))
+
+    def close_provider_batch(self, batch_id: str, status: str):
+        """Mark a provider batch as collected; unfinished jobs go back to pending."""
+        with self.conn:
+            self.conn.execute("UPDATE provider_batches SET status = ? WHERE id = ?", (status, batch_id))
+            self.conn.execute(
+                "UPDATE jobs SET status = 'pending', provider_batch = NULL "
+                "WHERE provider_batch = ? AND status = 'submitted'",
+                (batch_id,)
+            )
+
+    def counts(self, ids: Optional[Collection[str]] = None) -> Dict[str, int]:
+        """Number of jobs per status, optionally only those in ids."""
+        counts: Dict[str, int] = {}
+        for job_id, status in self.conn.execute("SELECT id, status FROM jobs"):
+            if ids is None or job_id in ids:
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def export(self, out_file: Path, ids: Optional[Collection[str]] = None) -> int:
+        """Write finished jobs (done and failed) to JSONL, optionally only those in ids."""
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        rows = self.conn.execute(
+            "SELECT id, payload, status, attempts, result, error FROM jobs "
+            "WHERE status IN ('done', 'failed') ORDER BY rowid"
+        )
+        written = 0
+        with jsonlines.open(out_file, mode='w') as writer:
+            for job_id, payload, status, attempts, result, error in rows:
+                if ids is not None and job_id not in ids:
+                    continue
+                record = json.loads(payload)
+                record.update(status=status, attempts=attempts, error=error)
+                record["result"] = json.loads(result) if result else None
+                writer.write(record)
+                written += 1
+        return written
+
+    def close(self):
+        self.conn.close()
+
+
+def job_id(job: Dict, system: str = "") -> str:
+    """
+    Content-derived id: the same job gets the same id in any jobs file.
+
+    The model and the system prompt (rendered from the style profile) are
+    part of the key, so changing either yields new jobs instead of reusing
+    results produced for the old ones.
+    """
+    key = json.dumps([job.get("kind"), job.get("topic"), job.get("model"),
+                      job.get("min_references"),
+                      hashlib.sha1(system.encode("utf-8")).hexdigest()], ensure_ascii=False)
+    return "job-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def load_jobs(jobs_file: Path, model: Optional[str] = None, system: str = "") -> List[Dict]:
+    """
+    Read jobs from JSONL.
+
+    Each line needs ``kind`` (outline|citations) and ``topic``; ``id``,
+    ``model`` and ``min_references`` are optional. Missing ids are derived
+    from the job's content (job_id), so re-running a file resumes it and
+    different files sharing a state store do not collide.
+
+    Args:
+        jobs_file: Jobs JSONL
+        model: Default model, recorded on jobs that do not name one
+        system: System prompt the jobs will run with (part of the id)
+    """
+    jobs = []
+    with jsonlines.open(jobs_file) as reader:
+        for lineno, job in enumerate(reader, 1):
+            job.setdefault("kind", "outline")
+            if model:
+                job.setdefault("model", model)
+            job.setdefault("id", job_id(job, system))
+            if job["kind"] not in JOB_KINDS:
+                raise ValueError(f"{jobs_file}:{lineno}: unknown job kind {job['kind']!r}")
+            if not job.get("topic"):
+                raise ValueError(f"{jobs_file}:{lineno}: missing topic")
+            jobs.append(job)
+    return jobs
+
+
+class BatchRunner:
+    """Run queued jobs through a pool of reused LLMAdapter instances."""
+
+    def __init__(self, store: BatchStore, profile: Dict, model: str = "mock",
+                 retries: int = 3, concurrency: int = 4, backoff: float = 2.0,
+                 adapter_factory: Callable[[str], LLMAdapter] = LLMAdapter,
+                 job_ids: Optional[Collection[str]] = None):
+        self.store = store
+        self.profile = profile
+        self.model = model
+        self.retries = retries
+        self.concurrency = concurrency
+        self.backoff = backoff
+        self.adapter_factory = adapter_factory
+        self.system = PromptTemplates.get_system_prompt(profile)
+        # Yalnızca bu çalıştırmanın işleri (None: depodaki tüm işler)
+        self.job_ids = set(job_ids) if job_ids is not None else None
+        self._adapters: Dict[str, LLMAdapter] = {}
+        self._adapters_lock = threading.Lock()
+
+    def adapter(self, model: str) -> LLMAdapter:
+        """Return the shared adapter for a model, creating it once."""
+        with self._adapters_lock:
+            if model not in self._adapters:
+                self._adapters[model] = self.adapter_factory(model)
+            return self._adapters[model]
+
+    def build_prompt(self, job: Dict) -> str:
+        """Task prompt (without the shared system prefix) for a job."""
+        if job["kind"] == "citations":
+            return PromptTemplates.get_citation_prompt(
+                self.profile, job["topic"], job.get("min_references", 25), include_system=False
+            )
+        return PromptTemplates.get_outline_prompt(job["topic"], self.profile, include_system=False)
+
+    def parse_result(self, job: Dict, response: str) -> str:
+        """Serialize the parsed response, keeping raw text when it is not JSON."""
+        try:
+            data = parse_json_response(response, opening=JOB_KINDS[job["kind"]][1])
+        except ValueError:
+            return json.dumps(response, ensure_ascii=False)
+        invalid = validate_outline(data) if job["kind"] == "outline" else []
+        if invalid:
+            logger.warning(f"Job {job['id']}: invalid fields {invalid}")
+        return json.dumps(data, ensure_ascii=False)
+
+    def _run_job(self, job: Dict) -> Tuple[Dict, int, Optional[str], Optional[str]]:
+        """Run one job with retries; returns (job, attempts, result, error)."""
+        llm = self.adapter(job.get("model", self.model))
+        max_tokens = JOB_KINDS[job["kind"]][0]
+        prompt = self.build_prompt(job)
+        attempts = 0
+
+        try:
+            for attempt in Retrying(
+                stop=stop_after_attempt(self.retries + 1),
+                wait=wait_exponential(multiplier=self.backoff, max=60),
+                reraise=True
+            ):
+                with attempt:
+                    attempts += 1
+                    response = llm.generate(prompt, max_tokens=max_tokens, json_mode=True,
+                                            system=self.system, fallback=False,
+                                            tags={"job": job["id"], "retries": attempts - 1})
+            return job, attempts, self.parse_result(job, response), None
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed after {attempts} attempts: {e}")
+            return job, attempts, None, str(e)
+
+    def run(self) -> Dict[str, int]:
+        """
+        Run all pending (and previously failed) jobs directly.
+
+        Returns:
+            Job counts per status
+        """
+        jobs = self.store.jobs("pending", "failed", ids=self.job_ids)
+        logger.info(f"Running {len(jobs)} batch jobs")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._run_job, job) for job in jobs]
+            # Durum yalnızca ana thread'den yazılır (sqlite bağlantısı paylaşılmaz)
+            for future in as_completed(futures):
+                job, attempts, result, error = future.result()
+                status = "done" if error is None else "failed"
+                self.store.update(job["id"], status, attempts, result, error)
+
+        return self.store.counts(self.job_ids)
+
+    def submit_provider_batches(self) -> List[str]:
+        """
+        Submit pending jobs to discounted asynchronous batch endpoints.
+
+        Jobs whose model has no batch endpoint (Gemini, mock) are run directly.
+
+        Returns:
+            Submitted provider batch ids
+        """
+        groups: Dict[str, List[Dict]] = {}
+        for job in self.store.jobs("pending", "failed", ids=self.job_ids):
+            groups.setdefault(job.get("model", self.model), []).append(job)
+
+        submitted = []
+        for model, jobs in groups.items():
+            llm = self.adapter(model)
+            if not llm.client or not model.startswith(("gpt", "claude")):
+                continue
+            if model.startswith("gpt"):
+                batch_id = self._submit_openai(llm, jobs)
+            else:
+                batch_id = self._submit_claude(llm, jobs)
+            self.store.add_provider_batch(batch_id, model, [job["id"] for job in jobs])
+            logger.info(f"Submitted {len(jobs)} jobs as provider batch {batch_id}")
+            submitted.append(batch_id)
+
+        # Batch endpoint'i olmayan modeller doğrudan çalıştırılır
+        self.run()
+        return submitted
+
+    def collect_provider_batches(self) -> int:
+        """
+        Poll submitted provider batches and store finished results.
+
+        Returns:
+            Number of batches still in progress
+        """
+        in_progress = 0
+        for batch_id, model in self.store.open_provider_batches():
+            llm = self.adapter(model)
+            if not llm.client:
+                # Ör. API anahtarı bu çalıştırmada yok; batch açık kalır
+                logger.warning(f"Provider batch {batch_id}: no {model} client, skipped")
+                in_progress += 1
+                continue
+            if model.startswith("gpt"):
+                results = self._collect_openai(llm, batch_id)
+            else:
+                results = self._collect_claude(llm, batch_id)
+
+            if results is None:
+                in_progress += 1
+                continue
+
+            payloads = {job["id"]: job for job in self.store.jobs("submitted")}
+            for job_id, response, error in results:
+                job = payloads.get(job_id)
+                if job is None:
+                    continue
+                if error is None:
+                    self.store.update(job_id, "done", 1, self.parse_result(job, response), None, batch_id)
+                else:
+                    self.store.update(job_id, "failed", 1, None, error, batch_id)
+            self.store.close_provider_batch(batch_id, "collected")
+        return in_progress
+
+    def _submit_openai(self, llm: LLMAdapter, jobs: List[Dict]) -> str:
+        """Upload jobs to the OpenAI Batch API."""
+        lines = []
+        for job in jobs:
+            body = llm._openai_kwargs(self.build_prompt(job), JOB_KINDS[job["kind"]][0],
+                                      0.7, True, self.system)
+            lines.append(json.dumps({
+                "custom_id": job["id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }, ensure_ascii=False))
+
+        data = io.BytesIO("\n".join(lines).encode("utf-8"))
+        batch_file = llm.client.files.create(file=("batch.jsonl", data), purpose="batch")
+        batch = llm.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def _collect_openai(self, llm: LLMAdapter, batch_id: str) -> Optional[List[Tuple]]:
+        """Fetch OpenAI batch results, or None while still running."""
+        batch = llm.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.warning(f"Provider batch {batch_id} {batch.status}; jobs requeued")
+            return []
+        if batch.status != "completed":
+            return None
+
+        results = []
+        if batch.output_file_id:
+            for line in llm.client.files.content(batch.output_file_id).text.splitlines():
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    results.append((item["custom_id"], content, None))
+                else:
+                    results.append((item["custom_id"], None, str(item.get("error") or response)))
+        return results
+
+    def _submit_claude(self, llm: LLMAdapter, jobs: List[Dict]) -> str:
+        """Submit jobs to the Anthropic Message Batches API."""
+        requests = [{
+            "custom_id": job["id"],
+            "params": llm._claude_kwargs(self.build_prompt(job), JOB_KINDS[job["kind"]][0],
+                                         0.7, self.system)
+        } for job in jobs]
+        return llm.client.messages.batches.create(requests=requests).id
+
+    def _collect_claude(self, llm: LLMAdapter, batch_id: str) -> Optional[List[Tuple]]:
+        """Fetch Anthropic batch results, or None while still running."""
+        batch = llm.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        results = []
+        for item in llm.client.messages.batches.results(batch_id):
+            if item.result.type == "succeeded":
+                results.append((item.custom_id, item.result.message.content[0].text, None))
+            else:
+                results.append((item.custom_id, None, item.result.type))
+        return results
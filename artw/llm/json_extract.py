@@ -0,0 +1,266 @@
+﻿"""Tolerant JSON extraction from LLM output."""
+import json
+from typing import Any, Dict, List, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(fragment: str) -> str:
+    """
+    Fix common defects in a JSON fragment.
+
+    Drops trailing commas, closes an unterminated string and closes any
+    arrays/objects left open by a truncated response.
+
+    Args:
+        fragment: Text starting at the opening bracket of the payload
+
+    Returns:
+        Repaired JSON text
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    pending_comma = False
+
+    for ch in fragment:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch in " \t\r\n":
+            out.append(ch)
+            continue
+
+        if ch == ",":
+            pending_comma = True
+            continue
+
+        if pending_comma:
+            # Kapanıştan hemen önceki virgül (trailing comma) atılır
+            if ch not in "}]":
+                out.append(",")
+            pending_comma = False
+
+        if ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+        elif ch == '"':
+            in_string = True
+        out.append(ch)
+        if not stack:
+            break
+
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+
+    text = "".join(out).rstrip()
+    # Değeri gelmeden kesilmiş bir anahtar: "key":  ->  "key": null
+    if text.endswith(":"):
+        text += " null"
+    # Değeri olmayan yalnız anahtar: {"a": 1, "b"  ->  {"a": 1
+    elif stack and stack[-1] == "}" and text.endswith('"'):
+        body = text[:text.rfind('"', 0, len(text) - 1)].rstrip()
+        if body.endswith((",", "{")):
+            text = body.rstrip(",")
+
+    return text + "".join(reversed(stack))
+
+
+def _decode(payload: str) -> Any:
+    """json.loads, falling back to repair_json."""
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(payload))
+
+
+class JSONStreamExtractor:
+    """Locate a JSON payload in (possibly streamed) model output.
+
+    Chunks are fed as they arrive; fences and surrounding prose are skipped,
+    and ``feed`` reports when the top-level value has been closed so callers
+    can stop consuming the stream early. A bracketed span that does not
+    decode (e.g. "{not}" in prose) is skipped and scanning resumes after
+    its opening bracket.
+    """
+
+    def __init__(self, opening: str = "{["):
+        self.opening = opening
+        self.buffer = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level JSON value has been closed."""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a chunk of model output.
+
+        Args:
+            chunk: Next piece of text
+
+        Returns:
+            True once the payload is complete
+        """
+        self.buffer += chunk
+        if self.complete:
+            return True
+
+        while self._pos < len(self.buffer):
+            ch = self.buffer[self._pos]
+
+            if self._start is None:
+                if ch in self.opening:
+                    self._start = self._pos
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        _decode(self.buffer[self._start:self._pos + 1])
+                    except ValueError:
+                        # Düzyazıdaki süslü parantez; sonraki açılıştan devam
+                        self._pos = self._start + 1
+                        self._start = None
+                        continue
+                    self._end = self._pos + 1
+                    self._pos += 1
+                    return True
+
+            self._pos += 1
+
+        return False
+
+    @property
+    def payload(self) -> str:
+        """Raw payload text seen so far (may be truncated)."""
+        if self._start is None:
+            return ""
+        return self.buffer[self._start:self._end]
+
+    def parse(self) -> Any:
+        """
+        Parse the payload, repairing it if needed.
+
+        Returns:
+            Decoded JSON value
+
+        Raises:
+            ValueError: If no JSON payload was found or it cannot be repaired
+        """
+        payload = self.payload
+        if not payload:
+            raise ValueError("No JSON payload found in response")
+
+        try:
+            return _decode(payload)
+        except ValueError as e:
+            error = e
+
+        # Kesilmiş yanıtta ilk açılış düzyazıya ait olabilir: sonrakilerden dene
+        for pos in range(self._start + 1, len(self.buffer)):
+            if self.buffer[pos] not in self.opening:
+                continue
+            retry = JSONStreamExtractor(opening=self.opening)
+            retry.feed(self.buffer[pos:])
+            try:
+                return _decode(retry.payload)
+            except ValueError:
+                continue
+        raise error
+
+
+def parse_json_response(text: str, opening: str = "{[") -> Any:
+    """
+    Extract and parse JSON from a complete model response.
+
+    Args:
+        text: Response text, possibly fenced or wrapped in prose
+        opening: Accepted opening brackets for the top-level value
+
+    Returns:
+        Decoded JSON value
+
+    Raises:
+        ValueError: If no usable JSON payload is present
+    """
+    extractor = JSONStreamExtractor(opening=opening)
+    extractor.feed(text)
+    return extractor.parse()
+
+
+def validate_outline(outline: Any) -> List[str]:
+    """
+    Check an outline against PromptTemplates.OUTLINE_SCHEMA.
+
+    Args:
+        outline: Parsed outline
+
+    Returns:
+        Names of missing or invalid fields (empty if valid)
+    """
+    from ..prompts.templates import PromptTemplates
+
+    if not isinstance(outline, dict):
+        return list(PromptTemplates.OUTLINE_SCHEMA)
+
+    invalid = []
+    for field, expected in PromptTemplates.OUTLINE_SCHEMA.items():
+        value = outline.get(field)
+        if not isinstance(value, expected) or isinstance(value, bool) or value in ("", []):
+            invalid.append(field)
+        elif field == "sections" and not all(
+            isinstance(s, dict) and s.get("title") for s in value
+        ):
+            invalid.append(field)
+    return invalid
+
+
+def merge_outline_fields(outline: Dict, patch: Any, fields: List[str]) -> Dict:
+    """
+    Copy re-requested fields from a repair response into the outline.
+
+    Args:
+        outline: Outline being repaired (modified in place)
+        patch: Parsed repair response
+        fields: Fields that were re-requested
+
+    Returns:
+        The updated outline
+    """
+    if isinstance(patch, dict):
+        for field in fields:
+            if field in patch:
+                outline[field] = patch[field]
+    return outline
@@ -0,0 +1,141 @@
+﻿"""Per-call LLM metrics: latency, tokens and estimated cost."""
+import json
+import math
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from ..config import Config
+
+# USD per 1M tokens: (input, cached input, output). Longest prefix wins.
+# Liste fiyatları tahminidir; gerçek fatura için sağlayıcı paneline bakın.
+PRICING = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+    "gpt-4": (30.00, 30.00, 60.00),
+    "gpt-3.5": (0.50, 0.50, 1.50),
+    "claude-3-5-haiku": (0.80, 0.08, 4.00),
+    "claude-3-haiku": (0.25, 0.03, 1.25),
+    "claude-3-opus": (15.00, 1.50, 75.00),
+    "claude-3": (3.00, 0.30, 15.00),
+    "claude": (3.00, 0.30, 15.00),
+    "gemini-1.5-flash": (0.075, 0.01875, 0.30),
+    "gemini-2.0-flash": (0.10, 0.025, 0.40),
+    "gemini-1.5-pro": (1.25, 0.3125, 5.00),
+    "gemini": (0.50, 0.50, 1.50),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int,
+                  cached_tokens: int = 0) -> float:
+    """
+    Estimate the USD cost of a call from list prices.
+
+    Args:
+        model: Model name (``models/`` prefix is ignored)
+        prompt_tokens: Input tokens, including cached ones
+        completion_tokens: Output tokens
+        cached_tokens: Input tokens served from the provider's prompt cache
+
+    Returns:
+        Estimated cost (0.0 for unknown models and the mock)
+    """
+    name = model.split("/")[-1]
+    matches = [prefix for prefix in PRICING if name.startswith(prefix)]
+    if not matches:
+        return 0.0
+    price_in, price_cached, price_out = PRICING[max(matches, key=len)]
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * price_in + cached_tokens * price_cached
+            + completion_tokens * price_out) / 1_000_000
+
+
+class MetricsRecorder:
+    """Append one JSON line per LLM call to a local metrics file."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or Config.METRICS_FILE)
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict):
+        """Write a metrics record; failures are never fatal to the call."""
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+
+_recorder: Optional[MetricsRecorder] = None
+
+
+def get_recorder() -> Optional[MetricsRecorder]:
+    """Shared recorder, or None when metrics are disabled."""
+    global _recorder
+    if not Config.METRICS_ENABLED:
+        return None
+    if _recorder is None:
+        _recorder = MetricsRecorder()
+    return _recorder
+
+
+def load_metrics(path: Path) -> List[Dict]:
+    """Read metrics records, skipping unreadable lines."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(records: Iterable[Dict], by: str = "model") -> Dict[str, Dict]:
+    """
+    Aggregate call records per provider or model.
+
+    Args:
+        records: Records written by MetricsRecorder
+        by: Grouping key ("model" or "provider")
+
+    Returns:
+        Mapping of group -> summary statistics
+    """
+    groups: Dict[str, List[Dict]] = defaultdict(list)
+    for record in records:
+        groups[record.get(by, "unknown")].append(record)
+
+    summary = {}
+    for key, items in sorted(groups.items()):
+        latencies = [r["latency"] for r in items if r.get("latency") is not None]
+        ttfts = [r["ttft"] for r in items if r.get("ttft") is not None]
+        prompt_tokens = [r.get("prompt_tokens", 0) for r in items]
+        summary[key] = {
+            "calls": len(items),
+            "errors": sum(1 for r in items if r.get("error")),
+            # "retries" deneme sırasını taşır (0 = ilk deneme); her yeniden deneme bir kayıt
+            "retries": sum(1 for r in items if r.get("retries", 0) > 0),
+            "cache_hits": sum(1 for r in items if r.get("cache_hit")),
+            "latency_p50": percentile(latencies, 50),
+            "latency_p90": percentile(latencies, 90),
+            "latency_p99": percentile(latencies, 99),
+            "ttft_p50": percentile(ttfts, 50),
+            "prompt_tokens_avg": sum(prompt_tokens) / len(prompt_tokens),
+            "prompt_tokens_max": max(prompt_tokens),
+            "completion_tokens": sum(r.get("completion_tokens", 0) for r in items),
+            "cost": sum(r.get("cost", 0.0) for r in items),
+        }
+    return summary
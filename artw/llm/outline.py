@@ -0,0 +1,75 @@
+"""Outline generation: prompt, (streamed) response, schema repair."""
+from typing import Callable, Dict, List, Optional
+from ..prompts.templates import PromptTemplates
+from ..logger import logger
+from .adapter import LLMAdapter
+from .json_extract import (
+    JSONStreamExtractor, parse_json_response, validate_outline, merge_outline_fields
+)
+
+
+def draft_outline(
+    llm: LLMAdapter,
+    topic: str,
+    profile: Dict,
+    exemplars: Optional[List[str]] = None,
+    exemplar_tokens: int = 1500,
+    on_chunk: Optional[Callable[[str], None]] = None
+) -> Dict:
+    """
+    Generate an article outline and re-request invalid fields once.
+
+    Args:
+        llm: Adapter to call
+        topic: Article topic
+        profile: Style profile
+        exemplars: Retrieved corpus passages for the prompt
+        exemplar_tokens: Token budget for exemplars
+        on_chunk: If given, the response is streamed and each chunk passed
+            here as it arrives
+
+    Returns:
+        Dict with outline (None if the response was not JSON), raw response
+        text, repaired fields and fields still invalid after the repair
+    """
+    system = PromptTemplates.get_system_prompt(profile)
+    prompt = PromptTemplates.get_outline_prompt(
+        topic, profile, include_system=False,
+        exemplars=exemplars, exemplar_tokens=exemplar_tokens
+    )
+
+    extractor = JSONStreamExtractor(opening="{")
+    if on_chunk:
+        for chunk in llm.stream(prompt, max_tokens=3000, json_mode=True, system=system):
+            on_chunk(chunk)
+            # JSON kapandıktan sonra gelen metni beklemeye gerek yok
+            if extractor.feed(chunk):
+                break
+    else:
+        extractor.feed(llm.generate(prompt, max_tokens=3000, json_mode=True, system=system))
+
+    result = {"outline": None, "raw": extractor.buffer, "repaired": [], "invalid": []}
+    try:
+        outline = extractor.parse()
+    except ValueError:
+        return result
+
+    invalid = validate_outline(outline)
+    if invalid:
+        logger.info(f"Re-requesting invalid outline fields: {', '.join(invalid)}")
+        repair_prompt = PromptTemplates.get_outline_repair_prompt(
+            topic, profile, outline, invalid, include_system=False
+        )
+        try:
+            patch = parse_json_response(
+                llm.generate(repair_prompt, max_tokens=1500, json_mode=True, system=system),
+                opening="{"
+            )
+        except ValueError:
+            patch = {}
+        merge_outline_fields(outline, patch, invalid)
+        result["repaired"] = invalid
+        invalid = validate_outline(outline)
+
+    result.update(outline=outline, invalid=invalid)
+    return result
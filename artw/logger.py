@@ -1,17 +1,140 @@
 ﻿"""Logging setup."""
-from loguru import logger
 import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
 from .config import Config
 
-logger.remove()
-logger.add(
-    sys.stderr,
-    level=Config.LOG_LEVEL,
-    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>"
-)
-logger.add(
-    "data/artw.log",
-    rotation="10 MB",
-    retention="1 week",
-    level="DEBUG"
-)
+_logger = None
+
+
+def get_logger():
+    """Return the loguru logger, adding the sinks on first use."""
+    global _logger
+    if _logger is None:
+        from loguru import logger as _loguru
+        _loguru.remove()
+        _loguru.add(
+            sys.stderr,
+            level=Config.LOG_LEVEL,
+            format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>"
+        )
+        # Dosyaya yalnızca ana süreç yazar; enqueue ile diske yazma arka planda olur
+        _loguru.add(
+            Config.DATA_DIR / "artw.log",
+            rotation="10 MB",
+            retention="1 week",
+            level="DEBUG",
+            enqueue=True
+        )
+        _logger = _loguru
+    return _logger
+
+
+class _LazyLogger:
+    """Stand-in for loguru's logger that configures it on first call.
+    
+    Importing this module stays cheap (no loguru import, no log file opened)
+    until something is actually logged.
+    """
+    
+    def __getattr__(self, name):
+        return getattr(get_logger(), name)
+
+
+logger = _LazyLogger()
+
+
+class _DebugRateLimit:
+    """Filter passing at most N DEBUG/TRACE records per second; others always pass."""
+    
+    def __init__(self, per_second: int):
+        self.per_second = per_second
+        self.window = 0
+        self.count = 0
+    
+    def __call__(self, record) -> bool:
+        if record["level"].no > 10:
+            return True
+        now = int(time.monotonic())
+        if now != self.window:
+            self.window, self.count = now, 0
+        self.count += 1
+        return self.count <= self.per_second
+
+
+class _QueueSink:
+    """Worker-side sink: ship records to the parent without touching disk."""
+    
+    def __init__(self, queue):
+        self.queue = queue
+    
+    def __call__(self, message):
+        record = message.record
+        text = record["message"]
+        if record["exception"]:
+            # Traceback nesneleri pickle edilemez; metin olarak gönderilir
+            exc = record["exception"]
+            text += "\n" + "".join(traceback.format_exception(exc.type, exc.value, exc.traceback)).rstrip()
+        self.queue.put_nowait({
+            "time": record["time"],
+            "level": record["level"].name,
+            "name": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": text,
+        })
+
+
+def init_worker_logging(queue, debug_rate: int):
+    """
+    Process-pool initializer: send this worker's logs to the parent.
+    
+    Args:
+        queue: multiprocessing queue created by worker_logging()
+        debug_rate: Max DEBUG records per second forwarded from this worker
+    """
+    global _logger
+    from loguru import logger as _loguru
+    _loguru.remove()
+    _loguru.add(_QueueSink(queue), level="DEBUG", format="{message}",
+                filter=_DebugRateLimit(debug_rate))
+    _logger = _loguru
+
+
+def _drain(queue):
+    """Parent-side listener: re-emit worker records through the parent sinks."""
+    log = get_logger()
+    while True:
+        record = queue.get()
+        if record is None:
+            break
+        patch = {k: record[k] for k in ("time", "name", "function", "line")}
+        log.patch(lambda r: r.update(patch)).log(record["level"], record["message"])
+
+
+@contextmanager
+def worker_logging():
+    """
+    Collect process-pool worker logs in this process.
+    
+    Yields the (initializer, initargs) pair for ProcessPoolExecutor. Workers
+    never open the log file themselves, so rotation only happens here and
+    log calls in workers never wait on disk. Exit the executor before this
+    context so every worker has flushed its records.
+    """
+    import multiprocessing
+    
+    # Sink'ler fork'tan önce kurulsun: listener thread'i loguru kilitlerini
+    # fork anında tutarsa worker'daki logger.remove() sonsuza dek bekler
+    get_logger()
+    queue = multiprocessing.Queue()
+    listener = threading.Thread(target=_drain, args=(queue,), name="artw-log-listener", daemon=True)
+    listener.start()
+    try:
+        yield init_worker_logging, (queue, Config.LOG_DEBUG_RATE)
+    finally:
+        queue.put(None)
+        listener.join()
+        queue.close()
@@ -1,9 +1,24 @@
 ﻿"""Prompt templates for different LLMs."""
-from typing import Dict
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional
 from jinja2 import Template
+from ..analysis.exemplar_index import fit_to_budget
 
 class PromptTemplates:
-    """Manage prompt templates for LLM generation."""
+    """Manage prompt templates for LLM generation.
+    
+    Every prompt is a static, profile-dependent prefix (SYSTEM_PROMPT) plus a
+    small task-specific suffix. Callers that talk to an LLM should send the
+    prefix separately (``include_system=False`` + ``get_system_prompt``) so
+    providers can cache it across calls.
+    
+    Provider prompt caches only apply to prefixes of at least 1024 tokens
+    (OpenAI automatic caching, Anthropic ``cache_control``). The rendered
+    SYSTEM_PROMPT is ~200 tokens, so today it is not cached and ``cache_hit``
+    in ``artw stats`` stays 0; the split pays off once the prefix grows past
+    that minimum (e.g. longer writing rules, schemas or fixed exemplars).
+    """
     
     SYSTEM_PROMPT = Template("""Sen bir akademik makale yazarısın. Türk sanat tarihi ve eleştiri dergilerine yazıyorsun.
 
@@ -23,9 +38,7 @@ YAZIM KURALLARI:
 SIK KULLANILAN TERİMLER:
 {{ top_terms }}""")
     
-    ARTICLE_OUTLINE = Template("""{{ system_prompt }}
-
-GÖREV: Aşağıdaki konu için detaylı bir makale taslağı oluştur.
+    ARTICLE_OUTLINE = Template("""GÖREV: Aşağıdaki konu için detaylı bir makale taslağı oluştur.
 
 KONU: {{ topic }}
 
@@ -57,9 +70,36 @@ TASLAK ŞEKLİ:
 
 SADECE JSON döndür, başka bir şey yazma.""")
     
-    SECTION_WRITER = Template("""{{ system_prompt }}
+    # ARTICLE_OUTLINE çıktısının beklenen alanları ve tipleri
+    OUTLINE_SCHEMA = {
+        "title": str,
+        "abstract_tr": str,
+        "abstract_en": str,
+        "keywords_tr": list,
+        "keywords_en": list,
+        "sections": list,
+        "required_visuals": list,
+        "min_references": int,
+    }
+    
+    OUTLINE_REPAIR = Template("""GÖREV: Aşağıdaki makale taslağında bazı alanlar eksik ya da hatalı. Yalnızca bu alanları üret.
+
+KONU: {{ topic }}
 
-MAKALE BAĞLAMI:
+MEVCUT TASLAK:
+{{ outline }}
+
+EKSİK/HATALI ALANLAR: {{ fields }}
+
+Alanların biçimi ilk taslak şemasıyla aynı olmalı.
+SADECE bu alanları içeren bir JSON nesnesi döndür, başka bir şey yazma.""")
+    
+    EXEMPLARS = Template("""ÖRNEK PASAJLAR (korpustan; üslup ve terminoloji için referans al, içeriği kopyalama):
+{% for passage in passages %}
+[{{ loop.index }}] {{ passage }}
+{% endfor %}""")
+    
+    SECTION_WRITER = Template("""MAKALE BAĞLAMI:
 Başlık: {{ article_title }}
 Bölüm: {{ section_title }}
 
@@ -78,9 +118,7 @@ KURALLAR:
 
 BÖLÜM METNİ:""")
     
-    CITATION_GENERATOR = Template("""{{ system_prompt }}
-
-GÖREV: Aşağıdaki konu için akademik kaynakça listesi oluştur (APA-7).
+    CITATION_GENERATOR = Template("""GÖREV: Aşağıdaki konu için akademik kaynakça listesi oluştur (APA-7).
 
 KONU: {{ topic }}
 GEREKEN KAYNAK SAYISI: {{ min_references }}
@@ -105,56 +143,96 @@ Her kaynak şu formatta:
 SADECE JSON array döndür.""")
     
     @classmethod
-    def get_outline_prompt(cls, topic: str, profile: Dict) -> str:
-        """Generate outline creation prompt."""
-        system = cls.SYSTEM_PROMPT.render(
-            avg_length=int(profile.get('avg_doc_length', 4000)),
-            avg_sentence=profile['sentence_structure']['avg_sentence_length'],
-            lexical_diversity=profile['vocabulary']['lexical_diversity'],
-            doc_count=profile['document_count'],
-            top_terms=", ".join(list(profile['vocabulary']['top_50_words'].keys())[:20])
+    def get_system_prompt(cls, profile: Dict) -> str:
+        """Render the style-profile preamble (memoized per profile)."""
+        return _render_system_prompt(
+            int(profile.get('avg_doc_length', 4000)),
+            profile['sentence_structure']['avg_sentence_length'],
+            profile['vocabulary']['lexical_diversity'],
+            profile['document_count'],
+            ", ".join(list(profile['vocabulary']['top_50_words'].keys())[:20])
         )
+    
+    @classmethod
+    def _with_system(cls, profile: Dict, body: str, include_system: bool) -> str:
+        """Prepend the system preamble to a task prompt if requested."""
+        if not include_system:
+            return body
+        return f"{cls.get_system_prompt(profile)}\n\n{body}"
+    
+    @classmethod
+    def _with_exemplars(cls, body: str, exemplars: Optional[List[str]],
+                        max_tokens: int) -> str:
+        """Prepend retrieved corpus passages that fit in max_tokens."""
+        passages = fit_to_budget(exemplars or [], max_tokens)
+        if not passages:
+            return body
+        return f"{cls.EXEMPLARS.render(passages=passages).strip()}\n\n{body}"
+    
+    @classmethod
+    def get_outline_prompt(cls, topic: str, profile: Dict,
+                           include_system: bool = True,
+                           exemplars: Optional[List[str]] = None,
+                           exemplar_tokens: int = 1500) -> str:
+        """Generate outline creation prompt.
         
-        return cls.ARTICLE_OUTLINE.render(
-            system_prompt=system,
-            topic=topic
+        exemplars are corpus passages (best first, e.g. from ExemplarIndex);
+        as many as fit in exemplar_tokens are placed before the task.
+        """
+        body = cls.ARTICLE_OUTLINE.render(topic=topic)
+        body = cls._with_exemplars(body, exemplars, exemplar_tokens)
+        return cls._with_system(profile, body, include_system)
+    
+    @classmethod
+    def get_outline_repair_prompt(cls, topic: str, profile: Dict,
+                                  outline: Dict, fields: list,
+                                  include_system: bool = True) -> str:
+        """Generate prompt re-requesting only the invalid outline fields."""
+        valid = {k: v for k, v in outline.items() if k not in fields}
+        body = cls.OUTLINE_REPAIR.render(
+            topic=topic,
+            outline=json.dumps(valid, indent=2, ensure_ascii=False),
+            fields=", ".join(fields)
         )
+        return cls._with_system(profile, body, include_system)
     
     @classmethod
     def get_section_prompt(cls, profile: Dict, article_title: str, 
                           section_title: str, estimated_words: int,
-                          key_points: list, min_citations: int) -> str:
-        """Generate section writing prompt."""
-        system = cls.SYSTEM_PROMPT.render(
-            avg_length=int(profile.get('avg_doc_length', 4000)),
-            avg_sentence=profile['sentence_structure']['avg_sentence_length'],
-            lexical_diversity=profile['vocabulary']['lexical_diversity'],
-            doc_count=profile['document_count'],
-            top_terms=", ".join(list(profile['vocabulary']['top_50_words'].keys())[:20])
-        )
-        
-        return cls.SECTION_WRITER.render(
-            system_prompt=system,
+                          key_points: list, min_citations: int,
+                          include_system: bool = True,
+                          exemplars: Optional[List[str]] = None,
+                          exemplar_tokens: int = 1500) -> str:
+        """Generate section writing prompt (exemplars as in get_outline_prompt)."""
+        body = cls.SECTION_WRITER.render(
             article_title=article_title,
             section_title=section_title,
             estimated_words=estimated_words,
             key_points=", ".join(key_points),
             min_citations=min_citations
         )
+        body = cls._with_exemplars(body, exemplars, exemplar_tokens)
+        return cls._with_system(profile, body, include_system)
     
     @classmethod
-    def get_citation_prompt(cls, profile: Dict, topic: str, min_references: int = 25) -> str:
+    def get_citation_prompt(cls, profile: Dict, topic: str, min_references: int = 25,
+                            include_system: bool = True) -> str:
         """Generate citation list prompt."""
-        system = cls.SYSTEM_PROMPT.render(
-            avg_length=int(profile.get('avg_doc_length', 4000)),
-            avg_sentence=profile['sentence_structure']['avg_sentence_length'],
-            lexical_diversity=profile['vocabulary']['lexical_diversity'],
-            doc_count=profile['document_count'],
-            top_terms=", ".join(list(profile['vocabulary']['top_50_words'].keys())[:20])
-        )
-        
-        return cls.CITATION_GENERATOR.render(
-            system_prompt=system,
+        body = cls.CITATION_GENERATOR.render(
             topic=topic,
             min_references=min_references
         )
+        return cls._with_system(profile, body, include_system)
+
+
+@lru_cache(maxsize=32)
+def _render_system_prompt(avg_length: int, avg_sentence: float, lexical_diversity: float,
+                          doc_count: int, top_terms: str) -> str:
+    """Render SYSTEM_PROMPT once per distinct set of profile values."""
+    return PromptTemplates.SYSTEM_PROMPT.render(
+        avg_length=avg_length,
+        avg_sentence=avg_sentence,
+        lexical_diversity=lexical_diversity,
+        doc_count=doc_count,
+        top_terms=top_terms
+    )
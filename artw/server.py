@@ -0,0 +1,520 @@
+"""Resident ``artw serve`` daemon and its thin client.
+
+The daemon keeps what every cold CLI run rebuilds: imported libraries,
+loaded style profiles and exemplar indexes, LLM clients and a warm process
+pool. Requests are JSON over HTTP, on a Unix socket (the default where
+available) or a TCP port:
+
+    POST /<operation>   body: {"param": value, ...}  ->  {"result": ...}
+    GET  /status
+
+POST bodies must be sent as application/json. Over TCP every request must
+carry the shared ARTW_SERVER_TOKEN in an X-Artw-Token header, and only
+loopback addresses are served unless remote access is explicitly allowed.
+The Unix socket is readable by its owner only.
+
+Paths in requests are resolved on the server; clients send absolute paths.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import hmac
+import ipaddress
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from .config import Config
+from .logger import logger, worker_logging
+
+TCP_ADDRESS = "127.0.0.1:8765"
+TOKEN_HEADER = "X-Artw-Token"
+
+
+class ServerError(RuntimeError):
+    """Error reported by the daemon (or failure to reach it)."""
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """
+    Split a listen/connect address into (family, target).
+
+    "unix:/run/artw.sock" or any value containing "/" is a Unix socket;
+    "host:port" or a bare port is TCP (host defaults to 127.0.0.1).
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    if "/" in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def default_address() -> str:
+    """Unix socket under DATA_DIR, or loopback TCP where AF_UNIX is missing."""
+    if hasattr(socket, "AF_UNIX"):
+        return f"unix:{Config.DATA_DIR / 'artw.sock'}"
+    return TCP_ADDRESS
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _warm_worker():
+    """Import the heavy worker-side libraries once per pool process."""
+    import fitz  # noqa: F401
+    import docx  # noqa: F401
+    return os.getpid()
+
+
+def _close(value: Any):
+    close = getattr(value, "close", None)
+    if close:
+        close()
+
+
+class _Cache:
+    """
+    Values loaded from files, reloaded when the file changes.
+
+    Replaced values that have a close() method (exemplar indexes) are closed
+    as soon as no lease uses them any more.
+    """
+
+    def __init__(self, loader: Callable[[Path], Any], stamp: Callable[[Path], Path] = lambda p: p):
+        self.loader = loader
+        self.stamp = stamp
+        self.items: Dict[Path, Tuple[int, Any]] = {}
+        self.lock = threading.Lock()
+        # id(value) -> açık lease sayısı; yerine yenisi gelmiş ama hâlâ kullanılanlar
+        self._users: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+
+    def _hit(self, key: Path, mtime: int) -> Any:
+        # self.lock altında çağrılır
+        cached = self.items.get(key)
+        if not cached or cached[0] != mtime:
+            return None
+        self._users[id(cached[1])] = self._users.get(id(cached[1]), 0) + 1
+        return cached[1]
+
+    def _retire(self, value: Any):
+        # self.lock altında çağrılır
+        if self._users.get(id(value)):
+            self._retired[id(value)] = value
+        else:
+            _close(value)
+
+    @contextmanager
+    def lease(self, path: str) -> Iterator[Any]:
+        """Current value for path, kept open until the block exits."""
+        key = Path(path).resolve()
+        mtime = self.stamp(key).stat().st_mtime_ns
+        with self.lock:
+            value = self._hit(key, mtime)
+        if value is None:
+            loaded = self.loader(key)
+            with self.lock:
+                value = self._hit(key, mtime)
+                if value is None:
+                    previous = self.items.get(key)
+                    self.items[key] = (mtime, loaded)
+                    value, loaded = loaded, None
+                    self._users[id(value)] = 1
+                    if previous:
+                        self._retire(previous[1])
+            # Aynı dosyayı başka bir thread daha önce yükledi
+            if loaded is not None:
+                _close(loaded)
+        try:
+            yield value
+        finally:
+            with self.lock:
+                self._users[id(value)] -= 1
+                if not self._users[id(value)]:
+                    del self._users[id(value)]
+                    if id(value) in self._retired:
+                        _close(self._retired.pop(id(value)))
+
+    def get(self, path: str) -> Any:
+        """Current value for path; only for values that need no closing (dicts)."""
+        with self.lease(path) as value:
+            return value
+
+    def close(self):
+        with self.lock:
+            for _, value in self.items.values():
+                self._retire(value)
+            self.items.clear()
+
+
+def _load_json(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _load_index(path: Path):
+    from .analysis.exemplar_index import ExemplarIndex
+    return ExemplarIndex(path)
+
+
+class ArtwService:
+    """Pipeline operations backed by warm, shared state."""
+
+    OPERATIONS = ("ingest", "profile", "index", "generate_outline",
+                  "export_docx", "export_docx_batch")
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or Config.MAX_WORKERS
+        self.started = time.time()
+        self.requests = 0
+        self.profiles = _Cache(_load_json)
+        self.indexes = _Cache(_load_index, stamp=lambda p: p / "meta.json")
+        self._adapters: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stack = ExitStack()
+        self._log_args = self._stack.enter_context(worker_logging())[1]
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # --- warm state ---------------------------------------------------------
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        from .export.batch_export import init_worker
+        from .export.docx_builder import base_template
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(base_template(), *self._log_args)
+        )
+        # Tüm worker'lar şimdi başlasın ve kütüphaneleri yüklesin
+        for future in [executor.submit(_warm_worker) for _ in range(self.workers)]:
+            future.result()
+        logger.info(f"Worker pool ready ({self.workers} workers)")
+        return executor
+
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._start_pool()
+            return self._executor
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def adapter(self, model: str):
+        """One LLMAdapter (and provider client) per model, kept for reuse."""
+        from .llm.adapter import LLMAdapter
+
+        with self._lock:
+            if model not in self._adapters:
+                self._adapters[model] = LLMAdapter(model=model)
+            return self._adapters[model]
+
+    def warm_up(self):
+        """Load libraries and start the pool before the first request."""
+        from .llm import outline  # noqa: F401
+        from .analysis import style_profile  # noqa: F401
+        from .ingest import parallel_ingest  # noqa: F401
+        from .export import ooxml_stream  # noqa: F401
+
+        self.pool()
+
+    def close(self):
+        self._reset_pool()
+        self.indexes.close()
+        self._stack.close()
+
+    # --- dispatch -----------------------------------------------------------
+
+    def call(self, operation: str, params: Dict) -> Any:
+        """Run one operation; pool crashes restart the pool for the next call."""
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        self.requests += 1
+        try:
+            return getattr(self, operation)(**params)
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise
+
+    def status(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "workers": self.workers,
+            "pool": self._executor is not None,
+            "profiles": len(self.profiles.items),
+            "indexes": len(self.indexes.items),
+            "models": sorted(self._adapters),
+        }
+
+    # --- operations ---------------------------------------------------------
+
+    def ingest(self, src: str, out: str, sample: Optional[int] = None) -> Dict:
+        from .ingest.parallel_ingest import ingest_corpus
+
+        out_path = Path(out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        processed = ingest_corpus(Path(src), out_path, sample, executor=self.pool())
+        return {"processed": processed, "out": str(out_path)}
+
+    def profile(self, corpus: str, out: str) -> Dict:
+        from .analysis.style_profile import StyleProfiler
+
+        profiler = StyleProfiler()
+        profiler.load_corpus(Path(corpus))
+        profile_data = profiler.analyze()
+
+        out_path = Path(out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            json.dump(profile_data, f, indent=2, ensure_ascii=False)
+        return {
+            "out": str(out_path),
+            "document_count": profile_data['document_count'],
+            "avg_doc_length": profile_data['avg_doc_length'],
+        }
+
+    def index(self, corpus: str, out: str) -> Dict:
+        from .analysis.exemplar_index import build_index
+
+        return {"paragraphs": build_index(Path(corpus), Path(out)), "out": out}
+
+    def generate_outline(self, profile: str, topic: str, model: str = "mock",
+                         out: Optional[str] = None, index: Optional[str] = None,
+                         exemplars: int = 5, exemplar_tokens: int = 1500) -> Dict:
+        from .llm.outline import draft_outline
+
+        passages = []
+        if index:
+            with self.indexes.lease(index) as exemplar_index:
+                passages = [hit["text"] for hit in exemplar_index.search(topic, exemplars)]
+
+        result = draft_outline(self.adapter(model), topic, self.profiles.get(profile),
+                               exemplars=passages, exemplar_tokens=exemplar_tokens)
+        if out:
+            out_path = Path(out)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(out_path, 'w', encoding='utf-8') as f:
+                if result["outline"] is None:
+                    f.write(result["raw"])
+                else:
+                    json.dump(result["outline"], f, indent=2, ensure_ascii=False)
+        return result
+
+    def export_docx(self, outline: str, out: str, streaming: bool = False) -> Dict:
+        from .export.docx_builder import DocxBuilder, base_template
+
+        outline_data = _load_json(Path(outline))
+        out_path = Path(out)
+        if streaming:
+            from .export.ooxml_stream import StreamingDocxBuilder
+            builder = StreamingDocxBuilder(out_path)
+        else:
+            builder = DocxBuilder(template=base_template())
+        builder.build_from_outline(outline_data)
+        builder.save(out_path)
+        return {"out": str(out_path), "title": outline_data.get('title', 'N/A')}
+
+    def export_docx_batch(self, src: str, out_dir: str) -> Dict:
+        from .export.batch_export import export_batch
+
+        results = export_batch(Path(src), Path(out_dir), executor=self.pool())
+        return {"out_dir": out_dir, "documents": results}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "artw"
+
+    def address_string(self):
+        # Unix soketinde client_address boş string
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _reply(self, code: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        """Check the shared token (required over TCP, optional on the socket)."""
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode(),
+                                             token.encode()):
+            self._reply(401, {"error": f"Missing or invalid {TOKEN_HEADER} header"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path.strip("/") == "status":
+            self._reply(200, {"result": self.server.service.status()})
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        # Yalnız JSON: tarayıcıların ön kontrolsüz (text/plain, form) istekleri reddedilir
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+
+        operation = self.path.strip("/").replace("-", "_")
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            result = self.server.service.call(operation, params)
+        except (TypeError, ValueError, FileNotFoundError) as e:
+            logger.warning(f"{operation}: {e}")
+            self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:
+            logger.exception(f"{operation} failed")
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        logger.info(f"{operation} done in {time.perf_counter() - start:.2f}s")
+        self._reply(200, {"result": result})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # Önceki çalışmadan kalan soket dosyası
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        # Soket baştan 0600 oluşsun (bind ile chmod arasında açık kalmasın)
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+
+def serve(address: Optional[str] = None, workers: Optional[int] = None,
+          allow_remote: bool = False):
+    """
+    Run the daemon until interrupted.
+
+    Args:
+        address: Listen address (default: default_address())
+        workers: Warm pool size
+        allow_remote: Listen on non-loopback TCP addresses as well
+
+    Raises:
+        ValueError: TCP without ARTW_SERVER_TOKEN, or a non-loopback host
+            without allow_remote
+    """
+    address = address or default_address()
+    family, target = parse_address(address)
+    token = Config.SERVER_TOKEN
+    if family == "tcp":
+        if not token:
+            raise ValueError("Serving over TCP requires ARTW_SERVER_TOKEN "
+                             "(or use a Unix socket: unix:/path)")
+        if not is_loopback(target[0]) and not allow_remote:
+            raise ValueError(f"Refusing to listen on non-loopback host {target[0]} "
+                             "without --allow-remote")
+    else:
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+
+    service = ArtwService(workers)
+    try:
+        service.warm_up()
+        if family == "unix":
+            server = _UnixHTTPServer(target, _Handler)
+        else:
+            server = ThreadingHTTPServer(target, _Handler)
+        server.service = service
+        server.token = token
+        # SIGTERM de Ctrl-C gibi temiz kapansın (shutdown başka thread'den çağrılmalı)
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        logger.info(f"artw serve listening on {address} (pid {os.getpid()})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if family == "unix" and os.path.exists(target):
+                os.unlink(target)
+    finally:
+        service.close()
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServerClient:
+    """Minimal client used by CLI commands when a daemon address is set."""
+
+    def __init__(self, address: str, timeout: Optional[float] = None,
+                 token: Optional[str] = None):
+        self.address = address
+        self.timeout = timeout
+        self.token = Config.SERVER_TOKEN if token is None else token
+
+    def _request(self, method: str, path: str, params: Optional[Dict] = None) -> Any:
+        family, target = parse_address(self.address)
+        if family == "unix":
+            conn = _UnixHTTPConnection(target, self.timeout)
+        else:
+            conn = HTTPConnection(*target, timeout=self.timeout)
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        try:
+            body = json.dumps(params or {}, ensure_ascii=False).encode("utf-8")
+            conn.request(method, path, body=body if method == "POST" else None,
+                         headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read() or b"{}")
+        except OSError as e:
+            raise ServerError(f"artw server at {self.address} unreachable: {e}") from e
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise ServerError(payload.get("error", f"HTTP {response.status}"))
+        return payload["result"]
+
+    def call(self, operation: str, **params) -> Any:
+        return self._request("POST", f"/{operation}", params)
+
+    def status(self) -> Dict:
+        return self._request("GET", "/status")
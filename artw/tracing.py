@@ -0,0 +1,111 @@
+﻿"""Lightweight per-stage tracing (Chrome trace event format)."""
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+_enabled = False
+_events: List[Dict] = []
+
+
+def enable():
+    """Start recording spans in this process."""
+    global _enabled
+    _enabled = True
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _now_us() -> int:
+    # Duvar saati: worker süreçlerinin olayları aynı zaman ekseninde hizalanır
+    return time.time_ns() // 1000
+
+
+class span:
+    """Time a block as a trace event; a no-op unless tracing is enabled.
+
+        with span("pdf.extract", file=name):
+            ...
+    """
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, **args):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        if _enabled:
+            self.start = _now_us()
+        return self
+
+    def __exit__(self, *exc):
+        if _enabled and self.start:
+            _events.append({
+                "name": self.name,
+                "cat": self.name.split(".")[0],
+                "ph": "X",
+                "ts": self.start,
+                "dur": _now_us() - self.start,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            })
+        return False
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_in_worker(fn: Callable, *args) -> Tuple[Any, List[Dict]]:
+    """
+    Run fn with tracing on and return its result plus the recorded events.
+
+    Used as the task body of process-pool workers so their spans can be
+    merged into the parent's timeline with add_events.
+    """
+    enable()
+    _events.clear()
+    result = fn(*args)
+    events = list(_events)
+    _events.clear()
+    return result, events
+
+
+def add_events(events: List[Dict]):
+    """Merge events recorded in another process."""
+    if _enabled:
+        _events.extend(events)
+
+
+def write_trace(path: Path):
+    """Write the timeline as JSON loadable in Perfetto / chrome://tracing."""
+    pids = sorted({event["pid"] for event in _events})
+    parent = os.getpid()
+    metadata = [{
+        "name": "process_name",
+        "ph": "M",
+        "pid": pid,
+        "args": {"name": "artw" if pid == parent else f"worker {pid}"},
+    } for pid in pids]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": metadata + _events, "displayTimeUnit": "ms"},
+                  f, ensure_ascii=False, default=str)
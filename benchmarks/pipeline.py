@@ -0,0 +1,355 @@
+﻿"""Reproducible pipeline benchmarks on a synthetic corpus.
+
+Times ingest (per worker count), style profiling, citation extraction,
+prompt rendering, exemplar indexing/search and DOCX export at several corpus sizes and writes
+throughput and peak memory to a JSON results file:
+
+    python benchmarks/pipeline.py --sizes 10,50,200 --workers 1,2,4
+    python benchmarks/pipeline.py --compare benchmarks/results/bench-<old>.json
+
+With --compare, stages that got slower than --threshold (default 10%)
+are reported and the exit status is 1. Results produced with a different
+--pages, --seed or --repeat are refused (exit status 2).
+
+Each ingest measurement runs in a fresh interpreter, so its
+children_maxrss_mb is the peak RSS of that run's own workers.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Ölçümleri log çıktısı bozmasın
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from corpus_gen import TERMS, generate_corpus  # noqa: E402
+
+
+# --ingest-run çocuğunun sonuç satırı
+_RESULT_MARK = "INGEST_RESULT "
+
+
+def _children_maxrss_mb() -> Optional[float]:
+    """Peak RSS of the largest finished child of this process so far (Unix only)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux KB, macOS bayt döndürür
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def measure(fn: Callable[[], float], repeat: int,
+            trace_memory: bool = True) -> Tuple[float, float, Optional[float]]:
+    """
+    Run fn several times.
+
+    Args:
+        fn: Callable returning the amount of work done (docs, chars, ...)
+        repeat: Number of runs
+        trace_memory: Track peak Python allocations with tracemalloc. Must be
+            off for stages that fork workers: children inherit the tracing
+            and slow down by an order of magnitude.
+
+    Returns:
+        (median seconds, work per run, peak traced memory in MB or None)
+    """
+    times = []
+    peak = 0.0
+    work = 0.0
+    for _ in range(repeat):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        work = fn()
+        times.append(time.perf_counter() - start)
+        if trace_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+            tracemalloc.stop()
+    return statistics.median(times), work, peak if trace_memory else None
+
+
+def _ingest_run(src_dir: str, jsonl: str, workers: int, repeat: int) -> Dict:
+    """Body of an --ingest-run child: time ingest and report its workers' peak RSS."""
+    from artw.ingest.parallel_ingest import ingest_corpus
+
+    seconds, work, _ = measure(
+        lambda: ingest_corpus(Path(src_dir), Path(jsonl), workers=workers), repeat,
+        trace_memory=False
+    )
+    return {"seconds": seconds, "work": work, "children_maxrss_mb": _children_maxrss_mb()}
+
+
+def measure_ingest(src_dir: Path, jsonl: Path, workers: int, repeat: int) -> Dict:
+    """
+    Run _ingest_run in a fresh interpreter.
+
+    RUSAGE_CHILDREN only ever grows within a process, so measured in this
+    process every row after the first would report the largest worker of
+    any earlier run rather than its own.
+    """
+    args = json.dumps([str(src_dir), str(jsonl), workers, repeat])
+    proc = subprocess.run([sys.executable, __file__, "--ingest-run", args],
+                          stdout=subprocess.PIPE, text=True, check=True)
+    # İlerleme çubuğu da stdout'a yazar; sonuç işaretli satırdadır
+    line = next(l for l in reversed(proc.stdout.splitlines()) if l.startswith(_RESULT_MARK))
+    return json.loads(line[len(_RESULT_MARK):])
+
+
+class PipelineBenchmark:
+    """Run every stage for one corpus size and collect result rows."""
+
+    def __init__(self, workdir: Path, pages: int, seed: int, repeat: int):
+        self.workdir = workdir
+        self.pages = pages
+        self.seed = seed
+        self.repeat = repeat
+        self.results: List[Dict] = []
+
+    def record(self, stage: str, size: int, seconds: float, work: float,
+               unit: str, peak_mb: Optional[float], workers: Optional[int] = None, **extra):
+        row = {
+            "stage": stage,
+            "size": size,
+            "workers": workers,
+            "seconds": round(seconds, 4),
+            "throughput": round(work / seconds, 2) if seconds else None,
+            "unit": f"{unit}/s",
+            "peak_mem_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        }
+        row.update(extra)
+        self.results.append(row)
+        label = f"{stage}[{size}" + (f", w={workers}]" if workers else "]")
+        peak = row["peak_mem_mb"] if peak_mb is not None else extra.get("children_maxrss_mb")
+        print(f"  {label:<28} {seconds:8.3f}s  {row['throughput']:>12} {row['unit']:<12} "
+              f"peak {peak if peak is not None else '?'} MB")
+
+    def run_size(self, size: int, worker_counts: List[int]):
+        from artw.analysis.style_profile import StyleProfiler
+        from artw.analysis.citation_checker import APAValidator
+        from artw.prompts.templates import PromptTemplates, _render_system_prompt
+        from artw.export.docx_builder import DocxBuilder
+        from artw.export.ooxml_stream import StreamingDocxBuilder
+        from artw.analysis.exemplar_index import build_index, ExemplarIndex
+
+        corpus_dir = self.workdir / f"corpus-p{self.pages}-s{self.seed}"
+        pdfs = generate_corpus(corpus_dir, size, self.pages, self.seed)[:size]
+        # Sadece bu boyuttaki dosyalar ingest edilsin; bağlar korpusla aynı anahtarı taşır
+        src_dir = self.workdir / f"src-p{self.pages}-s{self.seed}-{size}"
+        src_dir.mkdir(parents=True, exist_ok=True)
+        for pdf in pdfs:
+            link = src_dir / pdf.name
+            if not link.exists():
+                try:
+                    link.symlink_to(pdf.resolve())
+                except OSError:
+                    link.write_bytes(pdf.read_bytes())
+        pdf_mb = sum(p.stat().st_size for p in pdfs) / (1024 * 1024)
+        jsonl = self.workdir / f"corpus-p{self.pages}-s{self.seed}-{size}.jsonl"
+
+        print(f"size={size} ({pdf_mb:.1f} MB of PDF)")
+
+        for workers in worker_counts:
+            run = measure_ingest(src_dir, jsonl, workers, self.repeat)
+            self.record("ingest", size, run["seconds"], run["work"], "docs", None, workers,
+                        mb_per_s=round(pdf_mb / run["seconds"], 2),
+                        children_maxrss_mb=run["children_maxrss_mb"])
+
+        profiler = StyleProfiler()
+        profiler.load_corpus(jsonl)
+        texts = profiler.texts
+        words = sum(len(t.split()) for t in texts)
+
+        seconds, _, peak = measure(lambda: (profiler.analyze(), words)[1], self.repeat)
+        self.record("profile", size, seconds, words, "words", peak)
+        profile = profiler.analyze()
+
+        validator = APAValidator()
+
+        def citations():
+            for text in texts:
+                validator.extract_in_text_citations(text)
+                validator.check_et_al_usage(text)
+                validator.validate_visual_captions(text)
+            return sum(len(t) for t in texts) / 1e6
+
+        seconds, work, peak = measure(citations, self.repeat)
+        self.record("citations", size, seconds, work, "Mchars", peak)
+
+        def prompts(n: int = 200):
+            # Ön bellekli ve ön belleksiz sistem prompt'u karışık ölçülmesin
+            _render_system_prompt.cache_clear()
+            for i in range(n):
+                PromptTemplates.get_outline_prompt(f"Konu {i}", profile)
+                PromptTemplates.get_section_prompt(profile, "Başlık", f"Bölüm {i}", 800, ["a", "b"], 3)
+                PromptTemplates.get_citation_prompt(profile, f"Konu {i}")
+            return 3 * n
+
+        seconds, work, peak = measure(prompts, self.repeat)
+        self.record("prompts", size, seconds, work, "prompts", peak)
+
+        index_dir = self.workdir / f"index-p{self.pages}-s{self.seed}-{size}"
+        seconds, work, peak = measure(lambda: build_index(jsonl, index_dir), self.repeat)
+        self.record("index", size, seconds, work, "paragraphs", peak)
+
+        exemplar_index = ExemplarIndex(index_dir)
+        queries = [f"{a} {b}" for a, b in zip(TERMS, reversed(TERMS))]
+
+        def search():
+            for query in queries:
+                exemplar_index.search(query, 5)
+            return len(queries)
+
+        seconds, work, peak = measure(search, self.repeat)
+        exemplar_index.close()
+        self.record("search", size, seconds, work, "queries", peak)
+
+        # Korpus büyüklüğüyle ölçeklenen bir taslak: belge başına bir bölüm
+        outline = {
+            "title": "Benchmark Taslağı",
+            "abstract_tr": texts[0][:1000] if texts else "",
+            "sections": [
+                {"title": f"Bölüm {i}", "content": text[:3000],
+                 "subsections": [{"title": "Alt", "content": text[3000:5000]}]}
+                for i, text in enumerate(texts)
+            ],
+            "references": [f"Kaynak {i}" for i in range(60)],
+        }
+        out = self.workdir / "bench.docx"
+        paragraphs = 12 + 4 * len(texts) + 60
+
+        def docx_build():
+            builder = DocxBuilder()
+            builder.build_from_outline(outline)
+            builder.save(out)
+            return paragraphs
+
+        def docx_stream():
+            builder = StreamingDocxBuilder(out)
+            builder.build_from_outline(outline)
+            builder.save(out)
+            return paragraphs
+
+        seconds, work, peak = measure(docx_build, self.repeat)
+        self.record("docx", size, seconds, work, "paragraphs", peak)
+        seconds, work, peak = measure(docx_stream, self.repeat)
+        self.record("docx_stream", size, seconds, work, "paragraphs", peak)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              stdout=subprocess.PIPE, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Bunlardan biri farklıysa süreler karşılaştırılamaz
+COMPARABLE_META = ("pages", "seed", "repeat")
+
+
+def check_comparable(baseline_file: Path, meta: Dict):
+    """Raise ValueError if baseline_file was produced with other COMPARABLE_META values."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get("meta", {})
+    differing = [f"{key} {baseline.get(key)} != {meta[key]}" for key in COMPARABLE_META
+                 if baseline.get(key) != meta[key]]
+    if differing:
+        raise ValueError(f"{baseline_file} was run with different settings: {', '.join(differing)}")
+
+
+def compare(current: List[Dict], baseline_file: Path, threshold: float) -> int:
+    """Print per-stage changes against a previous results file; return regressions."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(r["stage"], r["size"], r["workers"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nvs {baseline_file}:")
+    for row in current:
+        old = baseline.get((row["stage"], row["size"], row["workers"]))
+        if not old or not old["seconds"]:
+            continue
+        change = row["seconds"] / old["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        label = f"{row['stage']}[{row['size']}" + (f", w={row['workers']}]" if row["workers"] else "]")
+        print(f"  {label:<28} {old['seconds']:8.3f}s -> {row['seconds']:8.3f}s  {change:+7.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the artw pipeline on a synthetic corpus")
+    parser.add_argument("--sizes", default="10,50", help="Comma-separated corpus sizes (documents)")
+    parser.add_argument("--workers", default="1,4", help="Comma-separated ingest worker counts")
+    parser.add_argument("--pages", type=int, default=8, help="Pages per synthetic PDF")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median)")
+    parser.add_argument("--workdir", type=Path, default=ROOT / ".bench")
+    parser.add_argument("--out", type=Path, default=None, help="Results JSON")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown (fraction)")
+    parser.add_argument("--ingest-run", default=None, help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+
+    if opts.ingest_run:
+        print(_RESULT_MARK + json.dumps(_ingest_run(*json.loads(opts.ingest_run))))
+        return 0
+
+    if opts.compare:
+        # Uzun ölçümden önce reddet
+        try:
+            check_comparable(opts.compare, vars(opts))
+        except ValueError as e:
+            print(f"Cannot compare: {e}", file=sys.stderr)
+            return 2
+
+    sizes = [int(s) for s in opts.sizes.split(",")]
+    worker_counts = [int(w) for w in opts.workers.split(",")]
+
+    bench = PipelineBenchmark(opts.workdir, opts.pages, opts.seed, opts.repeat)
+    for size in sizes:
+        bench.run_size(size, worker_counts)
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out = opts.out or ROOT / "benchmarks" / "results" / f"bench-{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({
+            "meta": {
+                "timestamp": stamp,
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "sizes": sizes,
+                "workers": worker_counts,
+                "pages": opts.pages,
+                "seed": opts.seed,
+                "repeat": opts.repeat,
+            },
+            "results": bench.results,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\nResults → {out}")
+
+    if opts.compare:
+        return 1 if compare(bench.results, opts.compare, opts.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
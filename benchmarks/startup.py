@@ -0,0 +1,118 @@
+﻿"""Startup-time guard for the artw CLI.
+
+Times ``artw --help`` and ``artw inspect`` in fresh interpreters and checks
+that neither pulls in heavy libraries. Exits non-zero on a regression:
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --help-budget 0.3 --inspect-budget 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Hiçbir hafif komutun yüklememesi gereken modüller
+HEAVY = ["fitz", "docx", "jinja2", "openai", "anthropic", "google.generativeai",
+         "loguru", "requests", "jsonlines", "dotenv"]
+
+PROFILE = {
+    "document_count": 1,
+    "avg_doc_length": 100,
+    "vocabulary": {"unique_tokens": 10, "lexical_diversity": 0.5, "top_50_words": {"sanat": 3}},
+    "sentence_structure": {"avg_sentence_length": 12.0},
+}
+
+MODULE_PROBE = """
+import sys
+from artw.cli import cli
+try:
+    cli.main(args=sys.argv[1:], prog_name="artw", standalone_mode=False)
+except SystemExit:
+    pass
+print("\\n".join(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def time_command(args, cwd: Path, runs: int) -> float:
+    """Median wall time of ``python -m artw.cli <args>`` over several runs."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "artw.cli", *args], cwd=cwd, env=_env(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def heavy_imports(args, cwd: Path) -> list:
+    """Heavy modules present in sys.modules after running a command."""
+    result = subprocess.run([sys.executable, "-c", MODULE_PROBE, *args], cwd=cwd, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    loaded = set(result.stderr.splitlines())
+    return [name for name in HEAVY if name in loaded]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--help-budget", type=float, default=0.35, help="Seconds (median)")
+    parser.add_argument("--inspect-budget", type=float, default=0.6, help="Seconds (median)")
+    opts = parser.parse_args()
+
+    # Python'un kendi başlangıç süresi bütçeden düşülmez; aynı makinede karşılaştırın
+    baseline = statistics.median(
+        _timed([sys.executable, "-c", "pass"]) for _ in range(opts.runs)
+    )
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        profile = cwd / "profile.json"
+        profile.write_text(json.dumps(PROFILE), encoding="utf-8")
+
+        checks = [
+            ("--help", ["--help"], opts.help_budget),
+            ("inspect", ["inspect", "--profile", str(profile)], opts.inspect_budget),
+        ]
+        for name, args, budget in checks:
+            elapsed = time_command(args, cwd, opts.runs)
+            heavy = heavy_imports(args, cwd)
+            status = "ok" if elapsed <= budget and not heavy else "FAIL"
+            print(f"{name:<8} {elapsed * 1000:7.1f} ms (budget {budget * 1000:.0f} ms, "
+                  f"interpreter {baseline * 1000:.1f} ms)  {status}")
+            if elapsed > budget:
+                failures.append(f"{name} took {elapsed:.3f}s > {budget:.3f}s")
+            if heavy:
+                failures.append(f"{name} imported {', '.join(heavy)}")
+
+            # Hafif komutlar çalışma dizininde data/ veya out/ oluşturmamalı
+            created = [d for d in ("data", "out") if (cwd / d).exists()]
+            if created:
+                failures.append(f"{name} created {', '.join(created)}/")
+
+    for failure in failures:
+        print(f"  ✗ {failure}")
+    return 1 if failures else 0
+
+
+def _timed(cmd) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sys.exit(main())
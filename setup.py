@@ -18,9 +18,9 @@ setup(
         "tenacity>=8.2.0",
         "ratelimit>=2.2.1",
         "networkx>=3.2.0",
-        "openai>=1.0.0",
-        "google-generativeai>=0.3.0",
-        "anthropic>=0.18.0",
+        "openai>=1.26.0",
+        "google-generativeai>=0.5.0",
+        "anthropic>=0.40.0",
         "requests>=2.31.0",
     ],
     extras_require={
@@ -0,0 +1,24 @@
+"""Shared fixtures."""
+import pytest
+from artw.config import Config
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_data_dir(tmp_path_factory):
+    """Keep the log file and metrics out of the working tree's data/."""
+    data_dir = tmp_path_factory.mktemp("data")
+    Config.DATA_DIR = data_dir
+    Config.METRICS_FILE = data_dir / "llm_metrics.jsonl"
+    yield data_dir
+
+
+@pytest.fixture
+def profile():
+    """Minimal style profile accepted by PromptTemplates."""
+    return {
+        "document_count": 2,
+        "avg_doc_length": 1200,
+        "vocabulary": {"unique_tokens": 40, "lexical_diversity": 0.42,
+                       "top_50_words": {"sanat": 12, "resim": 9}},
+        "sentence_structure": {"avg_sentence_length": 18.5},
+    }
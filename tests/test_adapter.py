@@ -0,0 +1,69 @@
+"""LLMAdapter request building and streaming tests (no provider is called)."""
+import pytest
+from artw.llm.adapter import LLMAdapter, StreamError
+from artw.llm.outline import draft_outline
+
+
+@pytest.fixture
+def adapter():
+    return LLMAdapter(model="mock", metrics=None)
+
+
+def test_openai_kwargs_send_prefix_as_system_message(adapter):
+    kwargs = adapter._openai_kwargs("Görev", 500, 0.2, True, "Sistem")
+    assert kwargs["messages"] == [{"role": "system", "content": "Sistem"},
+                                  {"role": "user", "content": "Görev"}]
+    assert kwargs["response_format"] == {"type": "json_object"}
+    assert kwargs["max_tokens"] == 500 and kwargs["temperature"] == 0.2
+
+    plain = adapter._openai_kwargs("Görev", 500, 0.2, False, None)
+    assert plain["messages"] == [{"role": "user", "content": "Görev"}]
+    assert "response_format" not in plain
+
+
+def test_claude_kwargs_mark_prefix_for_caching(adapter):
+    kwargs = adapter._claude_kwargs("Görev", 500, 0.2, "Sistem")
+    assert kwargs["system"] == [{"type": "text", "text": "Sistem",
+                                 "cache_control": {"type": "ephemeral"}}]
+    assert kwargs["messages"] == [{"role": "user", "content": "Görev"}]
+    assert "system" not in adapter._claude_kwargs("Görev", 500, 0.2, None)
+
+
+def test_mock_stream_chunks_reassemble_to_mock_response(adapter):
+    chunks = list(adapter.stream("Görev", json_mode=True))
+    assert len(chunks) > 1 and all(len(chunk) <= 16 for chunk in chunks)
+    assert "".join(chunks) == adapter._mock_response("Görev", True)
+
+
+def provider_stream(adapter, *items):
+    """Make adapter stream items from a fake provider; exceptions are raised."""
+    adapter.model = "claude-stub"
+    adapter.client = object()
+
+    def fake_stream(*args):
+        for item in items:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    adapter._stream_claude = fake_stream
+
+
+def test_stream_falls_back_to_mock_before_first_chunk(adapter):
+    provider_stream(adapter, RuntimeError("overloaded"))
+    assert "".join(adapter.stream("Görev", json_mode=True)) == adapter._mock_response("Görev", True)
+
+
+def test_stream_raises_after_partial_output(adapter):
+    provider_stream(adapter, "partial ", RuntimeError("connection reset"))
+    received = []
+    with pytest.raises(StreamError, match="connection reset"):
+        for chunk in adapter.stream("Görev"):
+            received.append(chunk)
+    assert received == ["partial "]
+
+
+def test_draft_outline_does_not_save_truncated_stream(adapter, profile):
+    provider_stream(adapter, '{"title": "Yarım', RuntimeError("connection reset"))
+    with pytest.raises(StreamError):
+        draft_outline(adapter, "Konu", profile, on_chunk=lambda chunk: None)
@@ -0,0 +1,233 @@
+"""Batch runner tests against a local stub adapter."""
+import json
+import threading
+from types import SimpleNamespace
+import jsonlines
+import pytest
+from click.testing import CliRunner
+from artw.cli import cli
+from artw.llm.batch import BatchRunner, BatchStore, job_id, load_jobs
+
+OUTLINE = {"title": "Başlık", "sections": [{"title": "Giriş"}]}
+
+
+class StubAdapter:
+    """Returns queued responses; Exception instances are raised instead."""
+
+    def __init__(self, model, responses=None, client=None):
+        self.model = model
+        self.responses = list(responses or [])
+        self.client = client
+        self.calls = []
+
+    def generate(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        response = self.responses.pop(0) if self.responses else json.dumps(OUTLINE)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def _claude_kwargs(self, prompt, max_tokens, temperature, system):
+        return {"model": self.model, "max_tokens": max_tokens, "messages": [prompt]}
+
+
+def write_jobs(path, jobs):
+    with jsonlines.open(path, mode="w") as writer:
+        writer.write_all(jobs)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BatchStore(tmp_path / "state.db")
+    yield store
+    store.close()
+
+
+def runner_for(store, profile, adapter, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return BatchRunner(store, profile, adapter_factory=lambda model: adapter, **kwargs)
+
+
+def test_load_jobs_ids_come_from_content(tmp_path):
+    first = load_jobs(write_jobs(tmp_path / "a.jsonl", [
+        {"topic": "Osman Hamdi"}, {"kind": "citations", "topic": "Osman Hamdi"}, {"id": "x", "topic": "T"},
+    ]))
+    second = load_jobs(write_jobs(tmp_path / "b.jsonl", [
+        {"kind": "citations", "topic": "Osman Hamdi"}, {"topic": "Fikret Mualla"},
+    ]))
+
+    assert first[0]["id"] != first[1]["id"]
+    assert first[1]["id"] == second[0]["id"] == job_id(second[0])
+    assert second[1]["id"] not in {job["id"] for job in first}
+    assert first[2]["id"] == "x"
+
+
+def test_job_ids_depend_on_model_and_system_prompt(tmp_path):
+    jobs = write_jobs(tmp_path / "a.jsonl", [{"topic": "T"}, {"topic": "T", "model": "gpt-4o"}])
+
+    mock = load_jobs(jobs, model="mock", system="profil A")
+    other_model = load_jobs(jobs, model="claude-3", system="profil A")
+    other_profile = load_jobs(jobs, model="mock", system="profil B")
+
+    assert mock[0]["model"] == "mock" and other_model[0]["model"] == "claude-3"
+    assert len({mock[0]["id"], other_model[0]["id"], other_profile[0]["id"]}) == 3
+    # Dosyada model verilmişse varsayılan model kimliği değiştirmez
+    assert mock[1]["id"] == other_model[1]["id"] != other_profile[1]["id"]
+
+
+def test_cli_model_change_queues_new_jobs(tmp_path, profile):
+    jobs = write_jobs(tmp_path / "jobs.jsonl", [{"topic": "Osman Hamdi"}])
+    profile_file = tmp_path / "profile.json"
+    profile_file.write_text(json.dumps(profile), encoding="utf-8")
+
+    def run(model):
+        out = tmp_path / f"{model}.jsonl"
+        result = CliRunner().invoke(cli, [
+            "batch", "--jobs", str(jobs), "--profile", str(profile_file), "--model", model,
+            "--state", str(tmp_path / "state.db"), "--out", str(out), "--retries", "0",
+        ])
+        assert result.exit_code == 0, result.output
+        with jsonlines.open(out) as reader:
+            return result.output, list(reader)
+
+    output, [first] = run("mock")
+    assert "1 new jobs" in output
+    output, [second] = run("mock-2")
+    assert "1 new jobs" in output
+    assert second["model"] == "mock-2" and second["id"] != first["id"]
+    output, _ = run("mock")
+    assert "0 new jobs" in output
+
+
+def test_load_jobs_rejects_unknown_kind(tmp_path):
+    with pytest.raises(ValueError):
+        load_jobs(write_jobs(tmp_path / "a.jsonl", [{"kind": "poem", "topic": "T"}]))
+
+
+def test_retries_then_succeeds(store, profile):
+    store.add_jobs([{"id": "j1", "kind": "outline", "topic": "T"}])
+    adapter = StubAdapter("mock", [RuntimeError("429"), RuntimeError("500"), json.dumps(OUTLINE)])
+
+    counts = runner_for(store, profile, adapter, retries=3).run()
+
+    assert counts == {"done": 1}
+    assert len(adapter.calls) == 3
+    assert all(call["fallback"] is False for call in adapter.calls)
+    [row] = store.conn.execute("SELECT attempts, result FROM jobs WHERE id = 'j1'")
+    assert row[0] == 3
+    assert json.loads(row[1]) == OUTLINE
+
+
+def test_failed_jobs_resume_on_next_run(store, profile, tmp_path):
+    store.add_jobs([{"id": "j1", "kind": "outline", "topic": "T"},
+                    {"id": "j2", "kind": "outline", "topic": "U"}])
+    failing = StubAdapter("mock", [RuntimeError("down")] * 4 + [json.dumps(OUTLINE)] * 2)
+
+    # j1 ve j2 aynı anda çalışmasın ki yanıt sırası belirli olsun
+    assert runner_for(store, profile, failing, retries=1, concurrency=1).run() == {"failed": 2}
+
+    healthy = StubAdapter("mock")
+    assert runner_for(store, profile, healthy, retries=1).run() == {"done": 2}
+    assert len(healthy.calls) == 2
+
+    # Bitmiş işler tekrar çalıştırılmaz
+    again = StubAdapter("mock")
+    runner_for(store, profile, again).run()
+    assert again.calls == []
+
+    out = tmp_path / "out.jsonl"
+    assert store.export(out) == 2
+    with jsonlines.open(out) as reader:
+        records = list(reader)
+    assert [r["attempts"] for r in records] == [3, 3]
+    assert all(r["status"] == "done" and r["result"] == OUTLINE for r in records)
+
+
+def test_run_and_export_are_scoped_to_job_ids(store, profile, tmp_path):
+    store.add_jobs([{"id": "a", "kind": "outline", "topic": "A"}])
+    runner_for(store, profile, StubAdapter("mock"), job_ids={"a"}).run()
+
+    store.add_jobs([{"id": "b", "kind": "outline", "topic": "B"},
+                    {"id": "c", "kind": "outline", "topic": "C"}])
+    adapter = StubAdapter("mock")
+    assert runner_for(store, profile, adapter, job_ids={"b"}).run() == {"done": 1}
+    assert len(adapter.calls) == 1
+
+    out = tmp_path / "out.jsonl"
+    assert store.export(out, {"b"}) == 1
+    with jsonlines.open(out) as reader:
+        assert [r["id"] for r in reader] == ["b"]
+    assert store.counts() == {"done": 2, "pending": 1}
+
+
+def test_adapter_created_once_per_model_across_threads(store, profile):
+    store.add_jobs([{"id": f"j{i}", "kind": "outline", "topic": f"T{i}"} for i in range(16)])
+    created = []
+    lock = threading.Lock()
+
+    def factory(model):
+        with lock:
+            created.append(model)
+        return StubAdapter(model)
+
+    runner = BatchRunner(store, profile, backoff=0, concurrency=8, adapter_factory=factory)
+    assert runner.run() == {"done": 16}
+    assert created == ["mock"]
+
+
+class StubBatches:
+    """Stand-in for client.messages.batches."""
+
+    def __init__(self):
+        self.submitted = {}
+        self.ended = False
+
+    def create(self, requests):
+        batch_id = f"batch-{len(self.submitted) + 1}"
+        self.submitted[batch_id] = requests
+        return SimpleNamespace(id=batch_id)
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(processing_status="ended" if self.ended else "in_progress")
+
+    def results(self, batch_id):
+        # İlk iş başarılı, ikinci hatalı; üçüncüsü hiç dönmez
+        first, second = self.submitted[batch_id][:2]
+        message = SimpleNamespace(content=[SimpleNamespace(text=json.dumps(OUTLINE))])
+        yield SimpleNamespace(custom_id=first["custom_id"],
+                              result=SimpleNamespace(type="succeeded", message=message))
+        yield SimpleNamespace(custom_id=second["custom_id"], result=SimpleNamespace(type="errored"))
+
+
+def test_provider_batch_submit_and_collect(store, profile):
+    batches = StubBatches()
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    adapter = StubAdapter("claude-stub", client=client)
+    store.add_jobs([{"id": i, "kind": "outline", "topic": i} for i in ("j1", "j2", "j3")])
+    runner = runner_for(store, profile, adapter, model="claude-stub")
+
+    assert runner.submit_provider_batches() == ["batch-1"]
+    assert adapter.calls == []
+    assert store.counts() == {"submitted": 3}
+    assert [r["custom_id"] for r in batches.submitted["batch-1"]] == ["j1", "j2", "j3"]
+
+    assert runner.collect_provider_batches() == 1
+    assert store.counts() == {"submitted": 3}
+
+    batches.ended = True
+    assert runner.collect_provider_batches() == 0
+    assert store.counts() == {"done": 1, "failed": 1, "pending": 1}
+    assert store.open_provider_batches() == []
+    [result] = store.conn.execute("SELECT result FROM jobs WHERE id = 'j1'")
+    assert json.loads(result[0]) == OUTLINE
+
+
+def test_collect_skips_batches_without_client(store, profile):
+    store.add_jobs([{"id": "j1", "kind": "outline", "topic": "T"}])
+    store.add_provider_batch("batch-1", "claude-stub", ["j1"])
+    runner = runner_for(store, profile, StubAdapter("claude-stub", client=None))
+
+    assert runner.collect_provider_batches() == 1
+    assert store.open_provider_batches() == [("batch-1", "claude-stub")]
+    assert store.counts() == {"submitted": 1}
@@ -0,0 +1,71 @@
+"""Batch DOCX export tests."""
+import json
+import jsonlines
+from docx import Document
+from artw.export.batch_export import export_batch, load_outlines
+
+OUTLINE = {"title": "Başlık", "abstract_tr": "Özet", "sections": [{"title": "Giriş"}]}
+
+
+def test_load_outlines_from_directory(tmp_path):
+    (tmp_path / "b.json").write_text(json.dumps(OUTLINE), encoding="utf-8")
+    (tmp_path / "a.json").write_text(json.dumps(["not", "an", "outline"]), encoding="utf-8")
+
+    outlines, skipped = load_outlines(tmp_path)
+    assert outlines == [("b", OUTLINE)]
+    assert [s["name"] for s in skipped] == ["a"]
+
+
+def test_load_outlines_skips_invalid_json(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.json").write_text(json.dumps(OUTLINE), encoding="utf-8")
+    # generate-outline ham yanıtı .json olarak kaydedebilir
+    (src / "b.json").write_text("Mock response: API key gerekli.", encoding="utf-8")
+    outlines, skipped = load_outlines(src)
+    assert [name for name, _ in outlines] == ["a"]
+    assert skipped == [{"name": "b", "path": None, "seconds": 0.0, "error": "skipped: invalid JSON"}]
+
+    lines = tmp_path / "outlines.jsonl"
+    lines.write_text(f"{json.dumps(OUTLINE)}\n{{\"title\": \n\n{json.dumps(OUTLINE)}\n", encoding="utf-8")
+    outlines, skipped = load_outlines(lines)
+    assert [name for name, _ in outlines] == ["Başlık", "Başlık-2"]
+    assert [(s["name"], s["error"]) for s in skipped] == [("line-2", "skipped: invalid JSON")]
+
+
+def test_load_outlines_skips_unfinished_batch_jobs(tmp_path):
+    src = tmp_path / "results.jsonl"
+    with jsonlines.open(src, mode="w") as writer:
+        writer.write_all([
+            {"id": "ok", "kind": "outline", "status": "done", "result": OUTLINE},
+            {"id": "failed", "kind": "outline", "status": "failed", "result": None, "error": "429"},
+            {"id": "refs", "kind": "citations", "status": "done", "result": [{"apa_citation": "X"}]},
+            {"title": "Düz taslak"},
+            {"title": "Düz taslak"},
+        ])
+
+    outlines, skipped = load_outlines(src)
+    assert [name for name, _ in outlines] == ["ok", "Düz_taslak", "Düz_taslak-2"]
+    assert outlines[0][1] == OUTLINE
+    assert {s["name"]: s["error"] for s in skipped} == {
+        "failed": "skipped: job failed",
+        "refs": "skipped: citations result is not an outline",
+    }
+
+
+def test_export_batch_reports_skipped_records(tmp_path):
+    src = tmp_path / "results.jsonl"
+    with jsonlines.open(src, mode="w") as writer:
+        writer.write_all([
+            {"id": "ok", "kind": "outline", "status": "done", "result": OUTLINE},
+            {"id": "failed", "kind": "outline", "status": "failed", "result": None},
+        ])
+
+    results = export_batch(src, tmp_path / "out", workers=1)
+
+    by_name = {r["name"]: r for r in results}
+    assert by_name["ok"]["error"] is None
+    assert by_name["failed"]["error"].startswith("skipped")
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["ok.docx"]
+    texts = [p.text for p in Document(str(tmp_path / "out" / "ok.docx")).paragraphs]
+    assert "Başlık" in texts and "Giriş" in texts
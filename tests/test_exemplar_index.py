@@ -0,0 +1,119 @@
+"""BM25 exemplar index tests."""
+import math
+from pathlib import Path
+import jsonlines
+import pytest
+from artw.analysis.exemplar_index import (
+    ExemplarIndex, build_index, fit_to_budget, normalize, split_paragraphs
+)
+
+FILLER = "eserlerinde görülen renk kompozisyon ışık gölge dengesi dönemin ressamları tarafından uzun süre tartışılmış ve yorumlanmıştır"
+PARAGRAPHS = [
+    f"Osman Hamdi'nin tablolarında saray ve cami iç mekânları öne çıkar {FILLER}",
+    f"Empresyonizm akımı açık havada çalışan ressamlarla yayılmıştır {FILLER}",
+    f"Hat sanatı ile minyatür geleneği saray atölyelerinde birlikte gelişmiştir {FILLER}",
+]
+
+
+def write_corpus(path, paragraphs):
+    with jsonlines.open(path, mode="w") as writer:
+        for i, text in enumerate(paragraphs):
+            writer.write({"path": f"doc{i}.pdf", "text": text,
+                          "metadata": {"filename": f"doc{i}.pdf"}})
+    return path
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    corpus = write_corpus(tmp_path / "corpus.jsonl", PARAGRAPHS)
+    out = tmp_path / "index"
+    assert build_index(corpus, out) == len(PARAGRAPHS)
+    return out
+
+
+def test_normalize_folds_turkish_case_and_circumflex():
+    assert normalize("ÂLEM") == normalize("âlem") == ["alem"]
+    assert normalize("İSTANBUL ISIK") == ["istan", "ısık"]
+    assert normalize("Osman Hamdi'nin ve bir tablosu") == ["osman", "hamdi", "tablo"]
+
+
+def test_split_paragraphs_joins_hyphenation_and_drops_fragments():
+    text = "Sayfa 3\n\n" + "Bu paragraf kelime-\nlerin birleş-\ntiği uzun bir metin. " * 4
+    passages = split_paragraphs(text, min_words=10)
+    assert len(passages) == 1
+    assert "kelimelerin birleştiği" in passages[0]
+
+    long_block = "Bir iki üç dört beş. " * 10
+    assert len(split_paragraphs(long_block, min_words=1, max_words=12)) == 5
+
+
+def test_fit_to_budget_skips_passages_that_do_not_fit():
+    passages = ["a" * 40, "b" * 400, "c" * 40]
+    assert fit_to_budget(passages, 30) == ["a" * 40, "c" * 40]
+
+
+def test_search_ranks_and_scores_bm25(index_dir):
+    with ExemplarIndex(index_dir) as index:
+        hits = index.search("saray minyatür", k=3)
+
+        # "saray" iki paragrafta, "minyatür" yalnız üçüncüde geçer
+        assert [hit["id"] for hit in hits] == [2, 0]
+        assert hits[0]["source"] == "doc2.pdf"
+
+        def term_score(df, pid):
+            norm = index.k1 * (1 - index.b + index.b * index._doclens[pid] / index.avgdl)
+            idf = math.log(1 + (index.count - df + 0.5) / (df + 0.5))
+            return idf * (index.k1 + 1) / (1 + norm)
+
+        assert hits[0]["score"] == round(term_score(2, 2) + term_score(1, 2), 4)
+        assert hits[1]["score"] == round(term_score(2, 0), 4)
+        assert index.search("heykel") == []
+
+
+def test_rebuild_keeps_open_index_readable(tmp_path, index_dir):
+    old = ExemplarIndex(index_dir)
+    corpus = write_corpus(tmp_path / "new.jsonl", PARAGRAPHS[1:])
+    build_index(corpus, index_dir)
+    build_index(corpus, index_dir)
+
+    # Eski derleme kaldırılmış olsa da açık eşlemeler geçerli kalır
+    assert old.search("osman hamdi", k=1)[0]["source"] == "doc0.pdf"
+    old.close()
+
+    with ExemplarIndex(index_dir) as new:
+        assert new.count == 2
+        assert new.search("osman hamdi") == []
+    assert len(list(index_dir.glob("postings-*.bin"))) == 2
+
+
+def test_rebuild_tolerates_undeletable_old_builds(tmp_path, index_dir, monkeypatch):
+    corpus = write_corpus(tmp_path / "new.jsonl", PARAGRAPHS)
+    with ExemplarIndex(index_dir) as index:
+        oldest = index_dir / f"postings-{index.build}.bin"
+    build_index(corpus, index_dir)
+
+    # Windows: açık veya eşlenmiş dosya silinemez
+    unlink = Path.unlink
+    def locked(path, missing_ok=False):
+        if path == oldest:
+            raise PermissionError(13, "in use", str(path))
+        unlink(path, missing_ok=missing_ok)
+    monkeypatch.setattr(Path, "unlink", locked)
+
+    assert build_index(corpus, index_dir) == len(PARAGRAPHS)
+    assert oldest.exists()
+    with ExemplarIndex(index_dir) as index:
+        assert index.search("saray")
+
+    monkeypatch.setattr(Path, "unlink", unlink)
+    build_index(corpus, index_dir)
+    assert not oldest.exists()
+
+
+def test_close_releases_mappings(index_dir):
+    index = ExemplarIndex(index_dir)
+    files = list(index._files)
+    index.close()
+    assert files and all(f.closed for f in files)
+    with pytest.raises(ValueError):
+        index.search("saray")
@@ -0,0 +1,76 @@
+"""Tests for tolerant JSON extraction."""
+import json
+import pytest
+from artw.llm.json_extract import (
+    JSONStreamExtractor, parse_json_response, repair_json, validate_outline, merge_outline_fields
+)
+
+
+@pytest.mark.parametrize("fragment, expected", [
+    ('{"a": 1,}', {"a": 1}),
+    ('[1, 2,]', [1, 2]),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": "yarım', {"a": "yarım"}),
+    ('{"a": "kaçış\\', {"a": "kaçış"}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": {"b": [{"c": 1},', {"a": {"b": [{"c": 1}]}}),
+    ('{"a": "x, y}"}', {"a": "x, y}"}),
+])
+def test_repair_json(fragment, expected):
+    assert json.loads(repair_json(fragment)) == expected
+
+
+def test_repair_json_stops_after_top_level_value():
+    assert repair_json('{"a": 1} trailing {') == '{"a": 1}'
+
+
+def test_extractor_skips_fences_and_prose():
+    text = 'İşte taslak:\n```json\n{"title": "Başlık", "n": [1, 2]}\n```\nBaşka soru?'
+    assert parse_json_response(text) == {"title": "Başlık", "n": [1, 2]}
+
+
+def test_extractor_reports_completion_while_streaming():
+    extractor = JSONStreamExtractor(opening="{")
+    chunks = ['Sonuç: {"a', '": "}{"', ', "b": [1', ']}', ' sonrası']
+    done = [extractor.feed(chunk) for chunk in chunks]
+    assert done == [False, False, False, True, True]
+    assert extractor.parse() == {"a": "}{", "b": [1]}
+
+
+def test_extractor_skips_braces_in_prose():
+    assert parse_json_response('Sure {note} here: {"a": 1}') == {"a": 1}
+
+    extractor = JSONStreamExtractor(opening="{")
+    assert not extractor.feed("Sure {no")
+    assert not extractor.feed('te} here: {"a": [1,')
+    assert extractor.feed("2]} tail")
+    assert extractor.parse() == {"a": [1, 2]}
+
+
+def test_extractor_retries_after_truncated_prose_brace():
+    assert parse_json_response('Sure {note here: {"a": 1, "b": [2') == {"a": 1, "b": [2]}
+
+
+def test_extractor_respects_opening():
+    assert parse_json_response('liste [1] ve {"a": 1}', opening="{") == {"a": 1}
+    assert parse_json_response('{"a": 1} ve [1, 2]', opening="[") == [1, 2]
+
+
+def test_extractor_without_payload():
+    with pytest.raises(ValueError):
+        parse_json_response("JSON yok")
+
+
+def test_validate_and_merge_outline():
+    outline = {
+        "title": "Başlık", "abstract_tr": "Özet", "abstract_en": "",
+        "keywords_tr": ["a"], "keywords_en": ["b"], "sections": [{"title": "Giriş"}],
+        "required_visuals": [{}], "min_references": True,
+    }
+    invalid = validate_outline(outline)
+    assert invalid == ["abstract_en", "min_references"]
+
+    merge_outline_fields(outline, {"abstract_en": "Abstract", "min_references": 25, "title": "X"}, invalid)
+    assert validate_outline(outline) == []
+    assert outline["title"] == "Başlık"
@@ -0,0 +1,54 @@
+"""Worker log forwarding tests."""
+import os
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from artw.config import Config
+from artw.logger import _DebugRateLimit, worker_logging
+
+
+def log_in_worker(marker):
+    """Pool task: one plain record and one with a traceback."""
+    from artw.logger import logger
+    logger.info(f"{marker} from worker {os.getpid()}")
+    try:
+        {}["eksik"]
+    except KeyError:
+        logger.exception(f"{marker} failed")
+    return os.getpid()
+
+
+def test_worker_records_reach_parent_log_file():
+    marker = uuid.uuid4().hex
+    with worker_logging() as (init, initargs):
+        with ProcessPoolExecutor(max_workers=1, initializer=init, initargs=initargs) as executor:
+            pid = executor.submit(log_in_worker, marker).result()
+    # Test modülünde tanımlı olsaydı pytest toplarken logger'ı erken (data/ altında) kurardı
+    from artw.logger import logger
+    logger.complete()
+
+    text = (Config.DATA_DIR / "artw.log").read_text(encoding="utf-8")
+    assert f"{marker} from worker {pid}" in text
+    assert f"{marker} failed" in text
+    assert "KeyError: 'eksik'" in text and "log_in_worker" in text
+    assert pid != os.getpid()
+
+
+def record(level_no):
+    return {"level": SimpleNamespace(no=level_no)}
+
+
+def test_rate_limit_drops_debug_past_limit_but_keeps_higher_levels(monkeypatch):
+    clock = [100.0]
+    # artw.logger özniteliği modül değil logger nesnesi; modül sys.modules'tan alınır
+    monkeypatch.setattr(sys.modules["artw.logger"].time, "monotonic", lambda: clock[0])
+    limit = _DebugRateLimit(3)
+
+    assert [limit(record(10)) for _ in range(5)] == [True, True, True, False, False]
+    assert limit(record(5)) is False
+    assert all(limit(record(no)) for no in (20, 30, 40))
+
+    # Yeni saniyede sayaç sıfırlanır
+    clock[0] = 101.2
+    assert limit(record(10)) is True
@@ -0,0 +1,52 @@
+"""LLM call metrics tests."""
+from types import SimpleNamespace
+import pytest
+from artw.llm.adapter import LLMAdapter
+from artw.llm.batch import BatchRunner, BatchStore
+from artw.llm.metrics import MetricsRecorder, estimate_cost, load_metrics, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 90) == 5.0
+    assert percentile(values, 0) == 1.0
+    assert percentile([], 50) == 0.0
+
+
+def test_estimate_cost_uses_longest_prefix_and_cached_rate():
+    assert estimate_cost("gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+    assert estimate_cost("models/gemini-1.5-pro", 0, 1_000_000) == pytest.approx(5.0)
+    assert estimate_cost("claude-3-opus", 1_000_000, 0, cached_tokens=1_000_000) == pytest.approx(1.5)
+    assert estimate_cost("mock", 1000, 1000) == 0.0
+
+
+def test_retries_counted_once_per_retried_call(tmp_path, profile):
+    recorder = MetricsRecorder(tmp_path / "metrics.jsonl")
+    adapter = LLMAdapter(model="mock", metrics=recorder)
+    # Sağlayıcı çağrısını taklit et: iki kez hata, sonra yanıt
+    adapter.model = "claude-stub"
+    adapter.client = SimpleNamespace()
+    outcomes = [RuntimeError("overloaded"), RuntimeError("overloaded"), '{"title": "T"}']
+
+    def fake_generate(*args):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    adapter._generate_claude = fake_generate
+
+    store = BatchStore(tmp_path / "state.db")
+    store.add_jobs([{"id": "j1", "kind": "outline", "topic": "T", "model": "claude-stub"}])
+    BatchRunner(store, profile, retries=3, backoff=0, adapter_factory=lambda model: adapter).run()
+    store.close()
+
+    records = load_metrics(tmp_path / "metrics.jsonl")
+    assert [r["retries"] for r in records] == [0, 1, 2]
+    assert [bool(r["error"]) for r in records] == [True, True, False]
+
+    [row] = summarize(records).values()
+    assert row["calls"] == 3
+    assert row["errors"] == 2
+    assert row["retries"] == 2
@@ -0,0 +1,61 @@
+"""Streaming OOXML writer tests (compared against the python-docx path)."""
+from docx import Document
+from artw.export.docx_builder import DocxBuilder, base_template
+from artw.export.ooxml_stream import StreamingDocxBuilder
+
+OUTLINE = {
+    "title": "Osman Hamdi & <Kaplumbağa Terbiyecisi>",
+    "abstract_tr": "Özet metni\tsekmeli.",
+    "abstract_en": "Abstract text.",
+    "keywords_tr": ["oryantalizm", "müze"],
+    "keywords_en": ["orientalism"],
+    "sections": [
+        {"title": "Giriş", "key_points": ["Bağlam", "Yöntem"], "estimated_words": 600},
+        {"title": "Eser", "content": "Satır 1\nSatır 2 & <devam>",
+         "subsections": ["Alt 1", {"title": "Alt 2", "content": "Alt içerik"}]},
+    ],
+    "references": ["Eldem, E. (2010). Osman Hamdi Bey.", {"apa_citation": "Shaw, W. (2011)."}],
+}
+
+
+def paragraphs(path):
+    """(style, alignment, text, runs, page break) per body paragraph."""
+    result = []
+    for p in Document(str(path)).paragraphs:
+        runs = [(r.text, r.bold, r.italic) for r in p.runs]
+        page_break = bool(p._p.xpath('.//w:br[@w:type="page"]'))
+        result.append((p.style.name, p.alignment, p.text, runs, page_break))
+    return result
+
+
+def test_streamed_document_matches_python_docx(tmp_path):
+    reference = DocxBuilder(template=base_template())
+    reference.build_from_outline(OUTLINE)
+    reference.save(tmp_path / "reference.docx")
+
+    streamed = StreamingDocxBuilder(tmp_path / "streamed.docx")
+    streamed.build_from_outline(OUTLINE)
+    streamed.save(tmp_path / "streamed.docx")
+
+    expected = paragraphs(tmp_path / "reference.docx")
+    assert paragraphs(tmp_path / "streamed.docx") == expected
+    assert expected[0][:3] == ("Title", 1, OUTLINE["title"])
+    assert ("Anahtar Kelimeler: ", True, None) in expected[3][3]
+
+
+def test_incremental_api_and_control_characters(tmp_path):
+    path = tmp_path / "incremental.docx"
+    builder = StreamingDocxBuilder(path)
+    builder.add_front_matter({"title": "Başlık\x00\x0b", "abstract_tr": "a & b < c"})
+    for i in range(3):
+        builder.add_section({"title": f"Bölüm {i}", "content": f"İçerik {i}\x1f"})
+    builder.finish(["Kaynak"])
+
+    rows = paragraphs(path)
+    texts = [text for _, _, text, _, _ in rows]
+    assert texts[0] == "Başlık"
+    assert "a & b < c" in texts
+    assert [t for t in texts if t.startswith("Bölüm")] == ["Bölüm 0", "Bölüm 1", "Bölüm 2"]
+    assert "İçerik 2" in texts
+    assert rows[-2][:3] == ("Heading 1", None, "Kaynakça") and texts[-1] == "Kaynak"
+    assert builder.doc.paragraph_count == len(rows)
@@ -0,0 +1,94 @@
+"""Daemon request handling and cache tests (no worker pool is started)."""
+import os
+import threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+import pytest
+from artw.config import Config
+from artw.server import (
+    ServerClient, ServerError, TOKEN_HEADER, _Cache, _Handler, is_loopback, serve
+)
+
+
+class StubService:
+    def call(self, operation, params):
+        return {"operation": operation, **params}
+
+    def status(self):
+        return {"pid": 0}
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.service = StubService()
+    httpd.token = "secret"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, headers, body=b'{"topic": "x"}'):
+    host, port = address.split(":")
+    conn = HTTPConnection(host, int(port), timeout=5)
+    conn.request("POST", "/profile", body=body, headers=headers)
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+
+def test_client_sends_token(server):
+    client = ServerClient(server, timeout=5, token="secret")
+    assert client.call("profile", corpus="/c") == {"operation": "profile", "corpus": "/c"}
+    assert client.status() == {"pid": 0}
+
+
+def test_rejects_missing_token_and_non_json(server):
+    assert post(server, {"Content-Type": "application/json"}) == 401
+    assert post(server, {"Content-Type": "application/json", TOKEN_HEADER: "wrong"}) == 401
+    assert post(server, {"Content-Type": "text/plain", TOKEN_HEADER: "secret"}) == 415
+    assert post(server, {TOKEN_HEADER: "secret"}) == 415
+    assert post(server, {"Content-Type": "application/json; charset=utf-8",
+                         TOKEN_HEADER: "secret"}) == 200
+    with pytest.raises(ServerError, match="X-Artw-Token"):
+        ServerClient(server, timeout=5, token="").status()
+
+
+def test_tcp_requires_token_and_loopback(monkeypatch):
+    monkeypatch.setattr(Config, "SERVER_TOKEN", "")
+    with pytest.raises(ValueError, match="ARTW_SERVER_TOKEN"):
+        serve("127.0.0.1:0")
+    monkeypatch.setattr(Config, "SERVER_TOKEN", "secret")
+    with pytest.raises(ValueError, match="non-loopback"):
+        serve("0.0.0.0:0")
+    assert is_loopback("localhost") and is_loopback("::1") and not is_loopback("example.org")
+
+
+class Closable:
+    def __init__(self, path):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_cache_closes_replaced_values_after_last_lease(tmp_path):
+    path = tmp_path / "meta.json"
+    path.write_text("1")
+    cache = _Cache(Closable)
+
+    with cache.lease(path) as old:
+        with cache.lease(path) as same:
+            assert same is old
+        path.write_text("2")
+        os.utime(path, ns=(1, 1))
+        with cache.lease(path) as new:
+            assert new is not old
+        # Eski değer hâlâ kullanımda
+        assert not old.closed
+    assert old.closed and not new.closed
+
+    cache.close()
+    assert new.closed
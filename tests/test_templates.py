@@ -0,0 +1,24 @@
+"""Prompt template tests."""
+from artw.prompts.templates import PromptTemplates, _render_system_prompt
+
+
+def test_prompts_split_into_system_prefix_and_task(profile):
+    system = PromptTemplates.get_system_prompt(profile)
+    task = PromptTemplates.get_outline_prompt("Osman Hamdi", profile, include_system=False)
+    full = PromptTemplates.get_outline_prompt("Osman Hamdi", profile)
+
+    assert full == f"{system}\n\n{task}"
+    assert "sanat, resim" in system and "Osman Hamdi" not in system
+    assert "Osman Hamdi" in task and "STİL PROFİLİ" not in task
+
+
+def test_system_prompt_rendered_once_per_profile(profile):
+    _render_system_prompt.cache_clear()
+    first = PromptTemplates.get_system_prompt(profile)
+    second = PromptTemplates.get_system_prompt(dict(profile))
+    assert first is second
+    assert _render_system_prompt.cache_info().misses == 1
+
+    changed = dict(profile, document_count=3)
+    assert PromptTemplates.get_system_prompt(changed) != first
+    assert _render_system_prompt.cache_info().misses == 2
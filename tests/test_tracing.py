@@ -0,0 +1,54 @@
+"""Tracing layer tests."""
+import json
+import os
+import pytest
+from artw import tracing
+from artw.export.batch_export import export_batch
+
+OUTLINE = {"title": "Başlık", "sections": [{"title": "Giriş"}]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_trace(monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", False)
+    monkeypatch.setattr(tracing, "_events", [])
+
+
+def test_span_is_noop_when_disabled():
+    with tracing.span("ingest", files=1):
+        pass
+    assert tracing.traced("docx.build")(lambda x: x + 1)(1) == 2
+    tracing.add_events([{"name": "x", "pid": 1}])
+    assert tracing._events == []
+
+
+def test_write_trace_chrome_format(tmp_path):
+    tracing.enable()
+    with tracing.span("ingest.write", file="a.pdf"):
+        pass
+    tracing.add_events([{"name": "pdf.extract", "cat": "pdf", "ph": "X", "ts": 1, "dur": 2,
+                         "pid": -1, "tid": 1, "args": {}}])
+
+    out = tmp_path / "trace" / "t.json"
+    tracing.write_trace(out)
+    trace = json.loads(out.read_text(encoding="utf-8"))
+
+    assert trace["displayTimeUnit"] == "ms"
+    metadata = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+    assert {e["pid"]: e["args"]["name"] for e in metadata} == {
+        -1: "worker -1", os.getpid(): "artw"}
+    [event] = [e for e in trace["traceEvents"] if e["name"] == "ingest.write"]
+    assert event["cat"] == "ingest" and event["ph"] == "X" and event["dur"] >= 0
+    assert event["args"] == {"file": "a.pdf"}
+
+
+def test_worker_spans_are_merged_into_parent(tmp_path):
+    src = tmp_path / "outline.json"
+    src.write_text(json.dumps(OUTLINE), encoding="utf-8")
+    tracing.enable()
+
+    [result] = export_batch(tmp_path, tmp_path / "out", workers=1)
+    assert result["error"] is None
+
+    names = {(e["name"], e["pid"] == os.getpid()) for e in tracing._events}
+    assert {("export.batch", True), ("docx.build", False), ("docx.save", False)} <= names